@@ -1,9 +1,11 @@
 import os
+import time
 from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
 
-from src.db.mongo import init_mongo
+from src.db.mongo import get_db, init_mongo
+from src.db.monitoring import get_mongo_stats
 from src.routes.auth_routes import auth_bp
 from src.routes.analytics_routes import analytics_bp
 from src.routes.ml_routes import ml_bp
@@ -11,6 +13,9 @@ from src.routes.notifications_routes import notifications_bp
 from src.routes.subject_routes import subject_bp
 from src.routes.task_routes import task_bp
 from src.routes.schedule_routes import schedule_bp
+from src.services.metrics_service import init_metrics, render_metrics
+from src.services.ml_service import warm_up as warm_up_ml
+from src.services.request_instrumentation import init_request_instrumentation
 
 
 def create_app():
@@ -30,7 +35,7 @@ def create_app():
         app,
         resources={r"/api/*": {"origins": client_origin}},
         supports_credentials=False,
-        allow_headers=["Content-Type", "Authorization"],
+        allow_headers=["Content-Type", "Authorization", "Prefer", "Idempotency-Key"],
         methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     )
 
@@ -39,6 +44,18 @@ def create_app():
     # --------------------------------------------------
     init_mongo()
 
+    # --------------------------------------------------
+    # ML STACK (lazy by default; ML_WARMUP=1 loads it now)
+    # --------------------------------------------------
+    if os.getenv("ML_WARMUP") == "1":
+        warm_up_ml()
+
+    # --------------------------------------------------
+    # PER-REQUEST QUERY INSTRUMENTATION (Server-Timing, query budgets)
+    # --------------------------------------------------
+    init_request_instrumentation(app)
+    init_metrics(app)
+
     # --------------------------------------------------
     # REGISTER ROUTES
     # --------------------------------------------------
@@ -57,6 +74,22 @@ def create_app():
     def health():
         return {"ok": True, "service": "smart-study-scheduler-api"}
 
+    @app.get("/api/ready")
+    def ready():
+        """Live Mongo ping latency plus this worker's pool/command counters."""
+        t0 = time.perf_counter()
+        try:
+            get_db().command("ping")
+        except Exception as e:
+            return {"ok": False, "message": "Database unavailable", "detail": type(e).__name__}, 503
+        ping_ms = round((time.perf_counter() - t0) * 1000, 2)
+        return {"ok": True, "pingMs": ping_ms, "mongo": get_mongo_stats()}
+
+    @app.get("/api/metrics")
+    def metrics():
+        """Prometheus text format (all workers when PROMETHEUS_MULTIPROC_DIR is set)."""
+        return render_metrics()
+
     # --------------------------------------------------
     # ERROR HANDLERS
     # --------------------------------------------------
@@ -73,7 +106,10 @@ def create_app():
     return app
 
 
-app = create_app()
+# Process-pool children (spawn) re-import this file as __mp_main__ when it is
+# run as `python app.py`; only the serving process builds the app and connects
+if __name__ != "__mp_main__":
+    app = create_app()
 
 if __name__ == "__main__":
     app.run(
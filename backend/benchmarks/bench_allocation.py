@@ -0,0 +1,66 @@
+"""
+Allocation engine benchmark: day-by-day greedy loop vs cumulative-sum engine.
+
+Run from backend/:
+    python -m benchmarks.bench_allocation
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from datetime import date, timedelta
+
+from bson import ObjectId
+
+from src.services.scheduler_service import allocate_days, allocate_days_greedy
+
+SIZES = [10, 1_000, 10_000]
+DAILY_MINUTES = 120
+START = date(2026, 1, 5)
+
+
+def _synthetic_backlog(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    tasks, task_meta = [], {}
+    for i in range(n):
+        oid = ObjectId()
+        tasks.append({
+            "_id": oid,
+            "subjectId": f"subj{i % 8}",
+            "topic": f"Topic {i}",
+            "difficulty": rng.choice(["low", "medium", "high"]),
+            "deadline": (START + timedelta(days=rng.randint(0, 400))).isoformat(),
+            "status": "pending",
+            "missedCount": rng.randint(0, 2),
+        })
+        task_meta[str(oid)] = {"minutes": rng.randint(10, 240), "minutesSource": "estimated", "mlExplain": None}
+    tasks.sort(key=lambda t: t["deadline"])
+    return tasks, task_meta
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    print(f"{'tasks':>8} {'greedy ms':>12} {'cumsum ms':>12} {'speedup':>9}")
+    for n in SIZES:
+        tasks, task_meta = _synthetic_backlog(n)
+        expected = allocate_days_greedy(tasks, task_meta, START, DAILY_MINUTES)
+        actual = allocate_days(tasks, task_meta, START, DAILY_MINUTES)
+        assert actual == expected, f"engines disagree for {n} tasks"
+
+        repeat = 5 if n <= 1_000 else 2
+        greedy = _best_of(lambda: allocate_days_greedy(tasks, task_meta, START, DAILY_MINUTES), repeat)
+        cumsum = _best_of(lambda: allocate_days(tasks, task_meta, START, DAILY_MINUTES), repeat)
+        print(f"{n:>8} {greedy * 1000:>12.2f} {cumsum * 1000:>12.2f} {greedy / cumsum:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
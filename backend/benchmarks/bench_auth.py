@@ -0,0 +1,85 @@
+"""
+Authenticated request path: users lookup on every request vs the identity
+cache vs trusted token claims. Uses a throwaway user in MONGO_URI's database.
+
+Run from backend/:
+    python -m benchmarks.bench_auth
+"""
+
+from __future__ import annotations
+
+import statistics
+import time
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from flask import Flask, request
+
+from src.db.mongo import get_db
+from src.services import auth_middleware
+from src.services.auth_middleware import get_auth_cache_stats, require_auth
+from src.services.jwt_service import create_access_token
+
+REQUESTS = 2_000
+
+
+def _app() -> Flask:
+    app = Flask(__name__)
+
+    @app.get("/whoami")
+    @require_auth
+    def whoami():
+        return {"id": request.user["id"]}
+
+    return app
+
+
+def _run(client, token: str) -> list[float]:
+    headers = {"Authorization": f"Bearer {token}"}
+    samples = []
+    for _ in range(REQUESTS):
+        t0 = time.perf_counter()
+        res = client.get("/whoami", headers=headers)
+        samples.append(time.perf_counter() - t0)
+        assert res.status_code == 200
+    return samples
+
+
+def main():
+    load_dotenv()
+    db = get_db()
+    now = datetime.now(timezone.utc)
+    oid = db.users.insert_one(
+        {"name": "Bench", "email": f"bench-{now.timestamp()}@example.com", "passwordHash": "", "createdAt": now}
+    ).inserted_id
+    user_id = str(oid)
+    token = create_access_token(user_id, name="Bench", email="bench@example.com")
+    client = _app().test_client()
+
+    modes = [
+        ("db lookup", {"AUTH_CACHE_TTL_SECONDS": 0, "AUTH_TRUST_TOKEN_CLAIMS": False}),
+        ("ttl cache", {"AUTH_CACHE_TTL_SECONDS": 60, "AUTH_TRUST_TOKEN_CLAIMS": False}),
+        ("claims", {"AUTH_CACHE_TTL_SECONDS": 60, "AUTH_TRUST_TOKEN_CLAIMS": True}),
+    ]
+    try:
+        baseline = None
+        print(f"{'mode':>10} {'p50 us':>9} {'mean us':>9} {'saved us':>9} {'hit ratio':>10}")
+        for label, settings in modes:
+            for k, v in settings.items():
+                setattr(auth_middleware, k, v)
+            auth_middleware._identity_cache.clear()
+            auth_middleware._identity_cache_stats.update(hits=0, misses=0, claims=0)
+
+            samples = _run(client, token)
+            mean = statistics.mean(samples) * 1e6
+            baseline = baseline if baseline is not None else mean
+            print(
+                f"{label:>10} {statistics.median(samples) * 1e6:>9.0f} {mean:>9.0f} "
+                f"{baseline - mean:>9.0f} {get_auth_cache_stats()['hitRatio']:>10.3f}"
+            )
+    finally:
+        db.users.delete_one({"_id": oid})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Worker cold start: `init_mongo()` in a fresh process with the schema-version
+check (current behaviour) vs also issuing every create_index call (the
+previous per-worker startup). Run `python -m src.db.migrate` first so both
+modes see an up-to-date schema.
+
+Run from backend/:
+    python -m benchmarks.bench_cold_start
+"""
+
+from __future__ import annotations
+
+import os
+import statistics
+import subprocess
+import sys
+
+RUNS = 10
+
+_CHILD = """
+import sys, time
+from dotenv import load_dotenv
+load_dotenv()
+t0 = time.perf_counter()
+from src.db.mongo import init_mongo
+db = init_mongo()
+if sys.argv[1] == "indexes":
+    from src.db.migrate import INDEXES
+    for collection, specs in INDEXES.items():
+        for keys, options in specs:
+            db[collection].create_index(keys, **options)
+else:
+    db.command("ping")
+print(time.perf_counter() - t0)
+"""
+
+
+def _measure(mode: str) -> list[float]:
+    return [
+        float(
+            subprocess.run(
+                [sys.executable, "-c", _CHILD, mode],
+                env=dict(os.environ),
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+        )
+        for _ in range(RUNS)
+    ]
+
+
+def main():
+    print(f"{'mode':>14} {'median ms':>10} {'max ms':>8}")
+    for label, mode in (("create_index", "indexes"), ("version check", "check")):
+        samples = _measure(mode)
+        print(f"{label:>14} {statistics.median(samples) * 1000:>10.0f} {max(samples) * 1000:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
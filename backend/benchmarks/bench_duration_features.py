@@ -0,0 +1,70 @@
+"""
+Duration-model feature extraction: per-sample subject-average rescans
+(the pre-statistics implementation, O(n²)) vs the single-pass
+`build_duration_stats` (O(n)).
+
+Run from backend/:
+    python -m benchmarks.bench_duration_features
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+from src.services.ml_service import DIFFICULTY_ENCODING, build_duration_stats
+
+SIZES = [1_000, 10_000, 100_000]
+# The quadratic path takes minutes beyond this; larger sizes are extrapolated
+MAX_QUADRATIC_SIZE = 10_000
+
+
+def _synthetic_events(n: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "subjectId": f"subj{rng.randint(0, 11)}",
+            "estimatedMinutes": rng.randint(10, 180),
+            "difficulty": rng.choice(["low", "medium", "high"]),
+            "minutes": rng.randint(5, 240),
+            "outcome": "done",
+        }
+        for _ in range(n)
+    ]
+
+
+def _quadratic_features(events: list) -> list:
+    def subject_avg(subject_id):
+        mins = [int(e.get("minutes") or 0) for e in events if e.get("subjectId") == subject_id]
+        return sum(mins) / len(mins) if mins else 0.0
+
+    rows = []
+    for e in events:
+        diff_enc = DIFFICULTY_ENCODING.get(e["difficulty"], 2)
+        rows.append((e["estimatedMinutes"], diff_enc, subject_avg(e["subjectId"]), e["minutes"]))
+    return rows
+
+
+def _timed(fn, *args) -> float:
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    print(f"{'events':>8} {'rescan ms':>14} {'one-pass ms':>12}")
+    last_quadratic = None
+    for n in SIZES:
+        events = _synthetic_events(n)
+        one_pass = _timed(build_duration_stats, events)
+        if n <= MAX_QUADRATIC_SIZE:
+            last_quadratic = (n, _timed(_quadratic_features, events))
+            rescan = f"{last_quadratic[1] * 1000:.1f}"
+        else:
+            base_n, base_t = last_quadratic
+            rescan = f"~{base_t * (n / base_n) ** 2 * 1000:.0f} (est)"
+        print(f"{n:>8} {rescan:>14} {one_pass * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Ingesting N task outcomes: N calls to POST /api/schedule/events (one
+regeneration each) vs one POST /api/schedule/events/batch, for N = 1, 100
+and 1000. Reports wall time and Mongo commands issued. Seeds throwaway users
+in MONGO_URI's database and removes them afterwards.
+
+Run from backend/:
+    python -m benchmarks.bench_event_batch
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from flask import Flask
+
+from src.db.monitoring import command_metrics
+from src.db.mongo import init_mongo
+from src.routes.schedule_routes import schedule_bp
+from src.services import auth_middleware
+from src.services.jwt_service import create_access_token
+
+N_TASKS = 300
+BATCH_SIZES = (1, 100, 1000)
+
+
+def _commands() -> int:
+    return sum(c["count"] for c in command_metrics.snapshot().values())
+
+
+def _seed(db, user_id: str) -> list[str]:
+    now = datetime.now(timezone.utc)
+    rng = random.Random(7)
+    return [
+        str(oid)
+        for oid in db.tasks.insert_many([
+            {
+                "userId": user_id,
+                "subjectId": f"subj{i % 5}",
+                "topic": f"Topic {i}",
+                "difficulty": rng.choice(["low", "medium", "high"]),
+                "estimatedMinutes": rng.randint(15, 180),
+                "deadline": (now.date() + timedelta(days=rng.randint(0, 90))).isoformat(),
+                "status": "pending",
+                "missedCount": 0,
+                "createdAt": now,
+                "updatedAt": now,
+            }
+            for i in range(N_TASKS)
+        ]).inserted_ids
+    ]
+
+
+def _events(task_ids: list[str], n: int) -> list[dict]:
+    rng = random.Random(n)
+    today = date.today()
+    return [
+        {
+            "taskId": rng.choice(task_ids),
+            "outcome": rng.choice(["done", "done", "missed"]),
+            "minutes": rng.randint(10, 120),
+            "scheduledDate": (today - timedelta(days=rng.randint(0, 6))).isoformat(),
+        }
+        for _ in range(n)
+    ]
+
+
+def main():
+    load_dotenv()
+    db = init_mongo()
+    auth_middleware.AUTH_TRUST_TOKEN_CLAIMS = True
+    app = Flask(__name__)
+    app.register_blueprint(schedule_bp, url_prefix="/api/schedule")
+    client = app.test_client()
+
+    stamp = int(time.time())
+    users = []
+    try:
+        print(f"{'events':>7} {'path':>10} {'seconds':>9} {'commands':>9}")
+        for n in BATCH_SIZES:
+            for path in ("per-event", "batch"):
+                user_id = f"bench-{stamp}-{n}-{path}"
+                users.append(user_id)
+                task_ids = _seed(db, user_id)
+                events = _events(task_ids, n)
+                headers = {"Authorization": f"Bearer {create_access_token(user_id, name='Bench', email='bench@example.com')}"}
+
+                c0, t0 = _commands(), time.perf_counter()
+                if path == "batch":
+                    res = client.post("/api/schedule/events/batch", json={"events": events}, headers=headers)
+                    assert res.status_code == 200, res.get_json()
+                else:
+                    for event in events:
+                        res = client.post("/api/schedule/events", json=event, headers=headers)
+                        assert res.status_code == 200, res.get_json()
+                elapsed, commands = time.perf_counter() - t0, _commands() - c0
+                print(f"{n:>7} {path:>10} {elapsed:>9.2f} {commands:>9}")
+    finally:
+        for collection in ("tasks", "task_events", "schedules", "daily_rollups", "ml_models", "notifications"):
+            db[collection].delete_many({"userId": {"$in": users}})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Deadline-feasibility pass on a 10k-task backlog: `feasibility_report`
+(lateness at the current budget + minimum daily budget) next to the
+`allocate_days` it runs alongside. No database needed.
+
+Run from backend/:
+    python -m benchmarks.bench_feasibility
+"""
+
+from __future__ import annotations
+
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from bson import ObjectId
+
+from src.services.scheduler_service import _max_missed, _sort_tasks, allocate_days, feasibility_report
+
+N_TASKS = 10_000
+DAILY_MINUTES = 240
+RUNS = 30
+
+
+def _tasks(start: date) -> tuple[list, dict]:
+    rng = random.Random(11)
+    tasks = [
+        {
+            "_id": ObjectId(),
+            "topic": f"Topic {i}",
+            "difficulty": rng.choice(["low", "medium", "high"]),
+            "deadline": (start + timedelta(days=rng.randint(-5, 400))).isoformat() if rng.random() > 0.05 else "",
+            "missedCount": rng.choice([0, 0, 0, 1, 2]),
+        }
+        for i in range(N_TASKS)
+    ]
+    task_meta = {str(t["_id"]): {"minutes": rng.randint(10, 180)} for t in tasks}
+    return _sort_tasks(tasks, start), task_meta
+
+
+def _timed(fn) -> tuple[float, float, object]:
+    samples, result = [], None
+    for _ in range(RUNS):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000, max(samples) * 1000, result
+
+
+def main():
+    start = date.today()
+    tasks, task_meta = _tasks(start)
+    max_missed = _max_missed(tasks)
+
+    report_p50, report_max, report = _timed(
+        lambda: feasibility_report(tasks, task_meta, start, DAILY_MINUTES, max_missed)
+    )
+    alloc_p50, alloc_max, _ = _timed(lambda: allocate_days(tasks, task_meta, start, DAILY_MINUTES))
+
+    print(f"{N_TASKS} tasks, {DAILY_MINUTES} min/day")
+    print(f"{'feasibility_report':>20} p50 {report_p50:7.1f} ms  max {report_max:7.1f} ms")
+    print(f"{'allocate_days':>20} p50 {alloc_p50:7.1f} ms  max {alloc_max:7.1f} ms")
+    if report["deadlinesReachable"]:
+        budget = (
+            f"required {report['requiredDailyMinutes']} min/day, "
+            f"min budget {report['minDailyStudyMinutes']} min/day"
+        )
+    else:
+        budget = "no daily budget meets every deadline"
+    print(f"late tasks {report['lateTaskCount']}, overdue {report['overdueTaskCount']}, {budget}")
+
+
+if __name__ == "__main__":
+    main()
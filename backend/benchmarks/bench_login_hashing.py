@@ -0,0 +1,48 @@
+"""
+Login hashing throughput (bcrypt verifications per second) through the
+hashing pool with 1/2/4/8 worker processes, driven by concurrent request
+threads. Cores beyond os.cpu_count() will not add throughput.
+
+Run from backend/:
+    python -m benchmarks.bench_login_hashing
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.services import password_service
+from src.services.password_service import configure_pool, hash_password, shutdown_pool, verify_password
+
+WORKER_COUNTS = [1, 2, 4, 8]
+LOGINS = 64
+REQUEST_THREADS = 16
+
+
+def main():
+    print(f"cpu_count={os.cpu_count()} bcrypt rounds={password_service.BCRYPT_ROUNDS}")
+    print(f"{'workers':>8} {'logins/s':>10} {'speedup':>8}")
+    configure_pool(0)
+    password_hash = hash_password("correct horse battery staple")
+
+    baseline = None
+    for workers in WORKER_COUNTS:
+        configure_pool(workers, max_pending=LOGINS)
+        verify_password("warm up the pool", password_hash)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(REQUEST_THREADS) as threads:
+            results = list(threads.map(lambda _: verify_password("correct horse battery staple", password_hash), range(LOGINS)))
+        elapsed = time.perf_counter() - t0
+        assert all(results)
+
+        rate = LOGINS / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>10.1f} {rate / baseline:>7.1f}x")
+    shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Incremental schedule repair after one task event: `repair_plan` against the
+full re-sort + `allocate_days` + `feasibility_report` it replaces, on a
+5k-task backlog. First checks on random small backlogs that repair and full
+re-allocation give identical days; exits 1 on any mismatch. No database
+needed (the full path's task load and ML prediction are not included, so
+the real saving is larger).
+
+Run from backend/:
+    python -m benchmarks.bench_schedule_repair
+"""
+
+from __future__ import annotations
+
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from bson import ObjectId
+
+from src.services.scheduler_service import (
+    _effective_daily_minutes,
+    _max_missed,
+    _sort_tasks,
+    allocate_days,
+    feasibility_report,
+    repair_plan,
+)
+
+N_TASKS = 5_000
+DAILY_MINUTES = 1_440
+N_TRIALS = 2_000
+RUNS = 30
+
+
+def _tasks(rng: random.Random, start: date, n: int, max_missed: int) -> tuple[list, dict]:
+    tasks = [
+        {
+            "_id": ObjectId(),
+            "subjectId": f"subj{rng.randint(0, 4)}",
+            "topic": f"Topic {i}",
+            "difficulty": rng.choice(["low", "medium", "high"]),
+            "deadline": (start + timedelta(days=rng.randint(-3, 60))).isoformat() if rng.random() > 0.1 else "",
+            "status": rng.choice(["pending", "pending", "missed"]),
+            "missedCount": rng.randint(0, max_missed),
+        }
+        for i in range(n)
+    ]
+    task_meta = {
+        str(t["_id"]): {"minutes": rng.randint(10, 180), "minutesSource": "estimated", "mlExplain": None}
+        for t in tasks
+    }
+    return _sort_tasks(tasks, start), task_meta
+
+
+def _apply(tasks: list, task_id: str, outcome: str) -> list:
+    """The task list a full regeneration would load after the event."""
+    if outcome == "done":
+        return [t for t in tasks if str(t["_id"]) != task_id]
+    return [
+        {**t, "status": "missed", "missedCount": t["missedCount"] + 1} if str(t["_id"]) == task_id else t
+        for t in tasks
+    ]
+
+
+def _full(tasks: list, task_meta: dict, start: date, daily_minutes: int) -> tuple[list, int]:
+    tasks = _sort_tasks(tasks, start)
+    effective = _effective_daily_minutes(daily_minutes, _max_missed(tasks))
+    return allocate_days(tasks, task_meta, start, effective), effective
+
+
+def _check(rng: random.Random, start: date) -> tuple[int, int, int]:
+    """(repaired and equal, fell back, mismatched)"""
+    ok = fallback = bad = 0
+    for _ in range(N_TRIALS):
+        daily = rng.randint(30, 300)
+        tasks, task_meta = _tasks(rng, start, rng.randint(1, 40), max_missed=rng.choice([1, 2]))
+        days, effective = _full(tasks, task_meta, start, daily)
+        task_id = str(rng.choice(tasks)["_id"])
+        outcome = rng.choice(["done", "missed"])
+
+        repaired = repair_plan(days, start, daily, effective, task_id, outcome)
+        if repaired is None:
+            fallback += 1
+            continue
+        expected, _ = _full(_apply(tasks, task_id, outcome), task_meta, start, daily)
+        if repaired[2] == expected:
+            ok += 1
+        else:
+            bad += 1
+    return ok, fallback, bad
+
+
+# Both paths also build the feasibility report stored with the schedule
+def _repair_with_report(days: list, start: date, effective: int, task_id: str, outcome: str):
+    tasks, task_meta, repaired = repair_plan(days, start, DAILY_MINUTES, effective, task_id, outcome)
+    return repaired, feasibility_report(tasks, task_meta, start, effective, _max_missed(tasks))
+
+
+def _full_with_report(tasks: list, task_meta: dict, start: date):
+    days, effective = _full(tasks, task_meta, start, DAILY_MINUTES)
+    return days, feasibility_report(_sort_tasks(tasks, start), task_meta, start, effective, _max_missed(tasks))
+
+
+def _timed(fn) -> tuple[float, float]:
+    samples = []
+    for _ in range(RUNS):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000, max(samples) * 1000
+
+
+def main() -> int:
+    start = date.today()
+    rng = random.Random(5)
+    ok, fallback, bad = _check(rng, start)
+    print(f"equivalence: {ok} repaired, {fallback} fell back, {bad} mismatched")
+
+    # missedCount 0 so a "missed" event keeps the budget (otherwise repair falls back)
+    tasks, task_meta = _tasks(rng, start, N_TASKS, max_missed=0)
+    days, effective = _full(tasks, task_meta, start, DAILY_MINUTES)
+    # Late-ish in the plan (typical: today's work is done) and at the very start
+    rows = []
+    for label, index in (("event at 80%", int(N_TASKS * 0.8)), ("event at 0%", 0)):
+        task_id = str(tasks[index]["_id"])
+        for outcome in ("done", "missed"):
+            updated = _apply(tasks, task_id, outcome)
+            repair_ms = _timed(lambda: _repair_with_report(days, start, effective, task_id, outcome))
+            full_ms = _timed(lambda: _full_with_report(updated, task_meta, start))
+            rows.append((f"{label}, {outcome}", repair_ms, full_ms))
+
+    print(f"{N_TASKS} tasks, {DAILY_MINUTES} min/day, {len(days)} days")
+    print(f"{'':>20} {'repair p50':>11} {'max':>7} {'full p50':>9} {'max':>7}")
+    for label, (r50, rmax), (f50, fmax) in rows:
+        print(f"{label:>20} {r50:>8.1f} ms {rmax:>7.1f} {f50:>6.1f} ms {fmax:>7.1f}")
+
+    print("OK" if bad == 0 else "FAIL: repaired plan differs from full re-allocation")
+    return 0 if bad == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Cold-start latency: process start -> `import app` (create_app) -> first
+/api/health response, with the ML stack loaded lazily vs eagerly
+(ML_WARMUP=1, i.e. the previous import-time behaviour).
+
+Needs a reachable MONGO_URI (create_app initialises Mongo).
+
+Run from backend/:
+    python -m benchmarks.bench_startup
+"""
+
+from __future__ import annotations
+
+import os
+import statistics
+import subprocess
+import sys
+
+RUNS = 5
+
+_CHILD = """
+import sys, time
+t0 = time.perf_counter()
+from app import app
+ready = time.perf_counter()
+res = app.test_client().get("/api/health")
+assert res.status_code == 200
+first = time.perf_counter()
+print(ready - t0, first - t0, int("sklearn" in sys.modules))
+"""
+
+
+def _measure(ml_warmup: bool) -> tuple[list[float], list[float], bool]:
+    env = dict(os.environ)
+    env["ML_WARMUP"] = "1" if ml_warmup else "0"
+    ready, first, sklearn_loaded = [], [], False
+    for _ in range(RUNS):
+        out = subprocess.run(
+            [sys.executable, "-c", _CHILD],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        ready.append(float(out[0]))
+        first.append(float(out[1]))
+        sklearn_loaded = out[2] == "1"
+    return ready, first, sklearn_loaded
+
+
+def main():
+    print(f"{'mode':>8} {'create_app ms':>14} {'first resp ms':>14} {'sklearn loaded':>15}")
+    for label, eager in (("eager", True), ("lazy", False)):
+        ready, first, sklearn_loaded = _measure(eager)
+        print(
+            f"{label:>8} {statistics.median(ready) * 1000:>14.0f} "
+            f"{statistics.median(first) * 1000:>14.0f} {str(sklearn_loaded):>15}"
+        )
+
+
+if __name__ == "__main__":
+    main()
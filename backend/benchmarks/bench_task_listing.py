@@ -0,0 +1,92 @@
+"""
+GET /api/tasks latency for a 10k-task user: the full, unprojected listing
+vs keyset pages (limit=100) with a field projection. Seeds a throwaway user
+in MONGO_URI's database (run `python -m src.db.migrate` first) and removes
+it afterwards.
+
+Run from backend/:
+    python -m benchmarks.bench_task_listing
+"""
+
+from __future__ import annotations
+
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from flask import Flask
+
+from src.db.mongo import init_mongo
+from src.routes.task_routes import task_bp
+from src.services import auth_middleware
+from src.services.jwt_service import create_access_token
+
+N_TASKS = 10_000
+PAGE_SIZE = 100
+RUNS = 30
+
+
+def _percentiles(samples: list[float]) -> tuple[float, float]:
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return statistics.median(ordered) * 1000, p99 * 1000
+
+
+def main():
+    load_dotenv()
+    db = init_mongo()
+    user_id = f"bench-{int(time.time())}"
+    rng = random.Random(5)
+    now = datetime.now(timezone.utc)
+    db.tasks.insert_many([
+        {
+            "userId": user_id,
+            "subjectId": f"subj{i % 10}",
+            "topic": f"Topic {i} " + "x" * 80,
+            "difficulty": rng.choice(["low", "medium", "high"]),
+            "estimatedMinutes": rng.randint(15, 180),
+            "deadline": (now.date() + timedelta(days=rng.randint(0, 365))).isoformat(),
+            "status": "pending",
+            "missedCount": 0,
+            "createdAt": now + timedelta(milliseconds=i),
+            "updatedAt": now,
+        }
+        for i in range(N_TASKS)
+    ])
+
+    auth_middleware.AUTH_TRUST_TOKEN_CLAIMS = True
+    headers = {"Authorization": f"Bearer {create_access_token(user_id, name='Bench', email='bench@example.com')}"}
+    app = Flask(__name__)
+    app.register_blueprint(task_bp, url_prefix="/api/tasks")
+    client = app.test_client()
+
+    def timed(query: dict) -> tuple[float, dict]:
+        t0 = time.perf_counter()
+        res = client.get("/api/tasks", query_string=query, headers=headers)
+        return time.perf_counter() - t0, res.get_json()
+
+    try:
+        full = [timed({})[0] for _ in range(RUNS)]
+
+        paged = []
+        after = None
+        for _ in range(RUNS):
+            query = {"limit": PAGE_SIZE, "fields": "topic,deadline,status"}
+            if after:
+                query["after"] = after
+            elapsed, body = timed(query)
+            paged.append(elapsed)
+            after = body["nextCursor"]
+
+        print(f"{'variant':>24} {'p50 ms':>8} {'p99 ms':>8}")
+        for label, samples in (("full listing (before)", full), (f"page of {PAGE_SIZE} (after)", paged)):
+            p50, p99 = _percentiles(samples)
+            print(f"{label:>24} {p50:>8.1f} {p99:>8.1f}")
+    finally:
+        db.tasks.delete_many({"userId": user_id})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Gunicorn settings (picked up automatically when started from backend/):
+    gunicorn app:app
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+# Workers size their process pools from this (see password_service)
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+
+def on_starting(server):
+    # Stale per-worker metric files from a previous run would be summed in
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for name in os.listdir(multiproc_dir):
+            if name.endswith(".db"):
+                os.remove(os.path.join(multiproc_dir, name))
+
+    # Load NumPy / scikit-learn once in the master so forked workers share
+    # the imported modules instead of each paying the import on first use.
+    if os.getenv("ML_WARMUP") == "1":
+        from src.services.ml_service import warm_up
+
+        warm_up()
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
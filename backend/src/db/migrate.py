@@ -0,0 +1,142 @@
+"""
+Schema migrations: create/verify indexes, run pending data steps (see
+DATA_MIGRATIONS) and record the schema version.
+
+Run once per deploy, before starting (or rolling) the web workers:
+    python -m src.db.migrate
+Workers only compare the recorded version with SCHEMA_VERSION at startup
+(see `init_mongo`); they never build indexes themselves.
+"""
+
+import sys
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from pymongo.errors import OperationFailure
+
+from src.db.mongo import init_mongo
+
+# Bump whenever INDEXES, OBSOLETE_INDEXES or DATA_MIGRATIONS change
+SCHEMA_VERSION = 5
+
+# collection -> [(keys, options)]
+INDEXES = {
+    "users": [
+        ([("email", 1)], {"unique": True}),
+    ],
+    "subjects": [
+        ([("userId", 1), ("name", 1)], {"unique": True}),
+    ],
+    "tasks": [
+        # Cover GET /api/tasks ordering (deadline, difficulty desc, createdAt, _id),
+        # unfiltered and with the status / subjectId filters
+        ([("userId", 1), ("deadline", 1), ("difficulty", -1), ("createdAt", 1), ("_id", 1)], {}),
+        ([("userId", 1), ("status", 1), ("deadline", 1), ("difficulty", -1), ("createdAt", 1), ("_id", 1)], {}),
+        ([("userId", 1), ("subjectId", 1), ("deadline", 1), ("difficulty", -1), ("createdAt", 1), ("_id", 1)], {}),
+    ],
+    "schedules": [
+        ([("userId", 1), ("createdAt", -1)], {}),
+    ],
+    "task_events": [
+        ([("userId", 1), ("createdAt", -1)], {}),
+        # ML history scans: done events, optionally only those since the last fit
+        ([("userId", 1), ("outcome", 1), ("createdAt", 1)], {}),
+    ],
+    "notifications": [
+        ([("userId", 1), ("createdAt", -1)], {}),
+        ([("userId", 1), ("read", 1)], {}),
+    ],
+    "ml_models": [
+        ([("userId", 1)], {"unique": True}),
+    ],
+    "daily_rollups": [
+        ([("userId", 1), ("date", 1), ("subjectId", 1)], {"unique": True}),
+    ],
+    "schedule_jobs": [
+        # Background regeneration jobs are only interesting for a week
+        ([("createdAt", 1)], {"expireAfterSeconds": 7 * 24 * 3600}),
+    ],
+    "idempotency_keys": [
+        ([("userId", 1), ("key", 1)], {"unique": True}),
+        # Retries arrive within minutes; keep stored responses for a day
+        ([("createdAt", 1)], {"expireAfterSeconds": 24 * 3600}),
+    ],
+}
+
+# Superseded by the compound indexes above
+OBSOLETE_INDEXES = {
+    "tasks": ["userId_1_deadline_1", "userId_1_status_1"],
+    "task_events": ["userId_1_scheduledDate_1"],
+}
+
+
+def _backfill_rollups(db):
+    """Analytics reads only daily_rollups: fill them for events recorded before they existed."""
+    from src.services.analytics_service import rebuild_rollups
+
+    user_ids = db.task_events.distinct("userId")
+    for user_id in user_ids:
+        rebuild_rollups(user_id)
+    print(f"  daily_rollups rebuilt for {len(user_ids)} user(s)")
+
+
+def _backfill_duration_stats(db):
+    """
+    Store duration-model statistics for users whose done events predate
+    them; from then on record_done_event keeps them complete.
+    """
+    from src.services.ml_service import rebuild_duration_stats
+
+    user_ids = db.task_events.distinct("userId", {"outcome": "done"})
+    for user_id in user_ids:
+        rebuild_duration_stats(user_id)
+    print(f"  ml_models statistics rebuilt for {len(user_ids)} user(s)")
+
+
+# (schema version, step): data steps run once, when upgrading from an older version
+DATA_MIGRATIONS = [
+    (4, _backfill_rollups),
+    (5, _backfill_duration_stats),
+]
+
+
+def migrate(db) -> int:
+    current = int((db.meta.find_one({"_id": "schema"}, {"version": 1}) or {}).get("version") or 0)
+
+    for collection, specs in INDEXES.items():
+        for keys, options in specs:
+            name = db[collection].create_index(keys, **options)
+            print(f"  {collection}.{name}")
+
+    existing = {c: set(db[c].index_information()) for c in OBSOLETE_INDEXES}
+    for collection, names in OBSOLETE_INDEXES.items():
+        for name in names:
+            if name in existing[collection]:
+                try:
+                    db[collection].drop_index(name)
+                    print(f"  dropped {collection}.{name}")
+                except OperationFailure:
+                    pass  # dropped concurrently
+
+    for version, step in DATA_MIGRATIONS:
+        if current < version:
+            step(db)
+
+    db.meta.update_one(
+        {"_id": "schema"},
+        {"$set": {"version": SCHEMA_VERSION, "appliedAt": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+    return SCHEMA_VERSION
+
+
+def main() -> int:
+    load_dotenv()
+    db = init_mongo(check_schema=False)
+    version = migrate(db)
+    print(f"Schema is at version {version}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
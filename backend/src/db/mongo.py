@@ -1,11 +1,61 @@
+import logging
 import os
 from pymongo import MongoClient
 
+from src.db.monitoring import LISTENERS
+
+log = logging.getLogger(__name__)
+
 _client = None
 _db = None
 
 
-def init_mongo():
+def _client_options() -> dict:
+    """
+    Pool / timeout / compression settings from env; unset values keep the
+    driver defaults. Compressors the server or the installed extras
+    (python-snappy, zstd) don't support are skipped by the driver.
+    """
+    env_options = {
+        "maxPoolSize": ("MONGO_MAX_POOL_SIZE", int),
+        "minPoolSize": ("MONGO_MIN_POOL_SIZE", int),
+        "waitQueueTimeoutMS": ("MONGO_WAIT_QUEUE_TIMEOUT_MS", int),
+        "serverSelectionTimeoutMS": ("MONGO_SERVER_SELECTION_TIMEOUT_MS", int),
+        "compressors": ("MONGO_COMPRESSORS", str),
+    }
+    options = {}
+    for option, (var, cast) in env_options.items():
+        value = (os.getenv(var) or "").strip()
+        if value:
+            options[option] = cast(value)
+    return options
+
+
+def _check_schema(db):
+    """
+    One cheap read instead of creating indexes on every worker start.
+    Refuses to start when `python -m src.db.migrate` has not been run for this
+    release: idempotency keys, daily rollups and ML state rely on its unique
+    indexes to turn concurrent upserts into errors instead of duplicates.
+    MONGO_REQUIRE_SCHEMA=0 downgrades that to a warning.
+    """
+    from src.db.migrate import SCHEMA_VERSION
+
+    doc = db.meta.find_one({"_id": "schema"}, {"version": 1}) or {}
+    version = int(doc.get("version") or 0)
+    if version >= SCHEMA_VERSION:
+        return
+
+    message = (
+        f"Database schema is at version {version}, this release expects {SCHEMA_VERSION}; "
+        "run `python -m src.db.migrate`"
+    )
+    if os.getenv("MONGO_REQUIRE_SCHEMA", "1") != "0":
+        raise RuntimeError(message)
+    log.warning(message)
+
+
+def init_mongo(check_schema: bool = True):
     global _client, _db
     if _db is not None:
         return _db
@@ -19,21 +69,14 @@ def init_mongo():
     # 🛡️ Prevent newline / space bugs
     uri = uri.strip()
 
-    _client = MongoClient(uri)
+    _client = MongoClient(uri, event_listeners=LISTENERS, **_client_options())
 
     # Explicit DB selection (no guessing)
     _db = _client["smart_study_scheduler"]
 
-    # Indexes (safe to call multiple times)
-    _db.users.create_index("email", unique=True)
-    _db.subjects.create_index([("userId", 1), ("name", 1)], unique=True)
-    _db.tasks.create_index([("userId", 1), ("deadline", 1)])
-    _db.tasks.create_index([("userId", 1), ("status", 1)])
-    _db.schedules.create_index([("userId", 1), ("createdAt", -1)])
-    _db.task_events.create_index([("userId", 1), ("createdAt", -1)])
-    _db.task_events.create_index([("userId", 1), ("scheduledDate", 1)])
-    _db.notifications.create_index([("userId", 1), ("createdAt", -1)])
-    _db.notifications.create_index([("userId", 1), ("read", 1)])
+    # Indexes are managed by `python -m src.db.migrate`
+    if check_schema:
+        _check_schema(_db)
 
     return _db
 
@@ -42,5 +85,3 @@ def get_db():
     if _db is None:
         return init_mongo()
     return _db
-
-
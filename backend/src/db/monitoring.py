@@ -0,0 +1,167 @@
+"""
+pymongo event listeners: connection-pool checkout wait / in-use connections
+and per-command latency for this worker process, plus per-request command
+tracking (see src/services/request_instrumentation.py).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from contextvars import ContextVar
+
+from pymongo import monitoring
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {
+            "open": 0,
+            "inUse": 0,
+            "maxInUse": 0,
+            "checkouts": 0,
+            "checkoutFailures": 0,
+            "waitTotalMs": 0.0,
+            "waitMaxMs": 0.0,
+            "poolsCleared": 0,
+        }
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["waitAvgMs"] = stats["waitTotalMs"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return stats
+
+    def connection_checked_out(self, event):
+        wait_ms = float(getattr(event, "duration", 0.0) or 0.0) * 1000
+        with self._lock:
+            s = self._stats
+            s["checkouts"] += 1
+            s["inUse"] += 1
+            s["maxInUse"] = max(s["maxInUse"], s["inUse"])
+            s["waitTotalMs"] += wait_ms
+            s["waitMaxMs"] = max(s["waitMaxMs"], wait_ms)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._stats["checkoutFailures"] += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._stats["inUse"] = max(0, self._stats["inUse"] - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self._stats["open"] += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._stats["open"] = max(0, self._stats["open"] - 1)
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._stats["poolsCleared"] += 1
+
+    # Not tracked
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Count, failures and latency per command name (find, insert, aggregate, ...)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._commands: dict[str, dict] = {}
+
+    def _record(self, name: str, duration_micros: int, failed: bool):
+        ms = duration_micros / 1000
+        with self._lock:
+            c = self._commands.get(name)
+            if c is None:
+                c = self._commands[name] = {"count": 0, "failures": 0, "totalMs": 0.0, "maxMs": 0.0}
+            c["count"] += 1
+            c["failures"] += int(failed)
+            c["totalMs"] += ms
+            c["maxMs"] = max(c["maxMs"], ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            commands = {name: dict(c) for name, c in self._commands.items()}
+        for c in commands.values():
+            c["avgMs"] = c["totalMs"] / c["count"]
+        return commands
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event.command_name, event.duration_micros, False)
+
+    def failed(self, event):
+        self._record(event.command_name, event.duration_micros, True)
+
+
+# Commands of the request running in this thread/context, or None outside requests
+_request_commands: ContextVar[dict | None] = ContextVar("request_commands", default=None)
+
+
+class RequestCommandTracker(monitoring.CommandListener):
+    """
+    Attributes commands to the current request. Sync pymongo publishes events
+    on the calling thread, so a ContextVar is enough to find the request.
+    """
+
+    def started(self, event):
+        tracked = _request_commands.get()
+        if tracked is None:
+            return
+        tracked["count"] += 1
+        if event.command_name != "getMore":
+            # The collection is the value of the command's first key
+            target = next(iter(event.command.values()), "") if event.command else ""
+            tracked["shapes"][(event.command_name, target if isinstance(target, str) else "")] += 1
+
+    def succeeded(self, event):
+        tracked = _request_commands.get()
+        if tracked is not None:
+            tracked["dbMs"] += event.duration_micros / 1000
+
+    def failed(self, event):
+        self.succeeded(event)
+
+
+def start_request_tracking():
+    """Begin attributing commands to a fresh record; returns the reset token."""
+    return _request_commands.set({"count": 0, "dbMs": 0.0, "shapes": Counter()})
+
+
+def current_request_commands() -> dict | None:
+    return _request_commands.get()
+
+
+def stop_request_tracking(token):
+    _request_commands.reset(token)
+
+
+pool_metrics = PoolMetrics()
+command_metrics = CommandMetrics()
+
+LISTENERS = [pool_metrics, command_metrics, RequestCommandTracker()]
+
+
+def get_mongo_stats() -> dict:
+    return {"pool": pool_metrics.snapshot(), "commands": command_metrics.snapshot()}
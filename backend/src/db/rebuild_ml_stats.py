@@ -0,0 +1,33 @@
+"""
+Rebuild duration-model statistics from existing task_events (the schema-5
+migration backfills them once; run this with the API stopped, e.g. after
+editing task_events by hand).
+
+Usage (from backend/):
+    python -m src.db.rebuild_ml_stats            # every user with done events
+    python -m src.db.rebuild_ml_stats <userId>   # a single user
+"""
+
+import sys
+
+from dotenv import load_dotenv
+
+from src.db.mongo import get_db
+from src.services.ml_service import rebuild_duration_stats
+
+
+def main(argv: list[str]) -> int:
+    load_dotenv()
+    db = get_db()
+
+    user_ids = argv or db.task_events.distinct("userId", {"outcome": "done"})
+    for user_id in user_ids:
+        version, stats = rebuild_duration_stats(user_id)
+        n_samples = sum(s.get("n", 0) for s in stats.values())
+        print(f"{user_id}: {n_samples} samples across {len(stats)} subjects (history v{version})")
+    print(f"Rebuilt duration statistics for {len(user_ids)} user(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
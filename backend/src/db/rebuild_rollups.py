@@ -0,0 +1,31 @@
+"""
+Rebuild daily_rollups (per-day and all-time per-subject study totals) from
+existing task_events.
+
+Usage (from backend/):
+    python -m src.db.rebuild_rollups            # every user with events
+    python -m src.db.rebuild_rollups <userId>   # a single user
+"""
+
+import sys
+
+from dotenv import load_dotenv
+
+from src.db.mongo import get_db
+from src.services.analytics_service import rebuild_rollups
+
+
+def main(argv: list[str]) -> int:
+    load_dotenv()
+    db = get_db()
+
+    user_ids = argv or db.task_events.distinct("userId")
+    for user_id in user_ids:
+        written = rebuild_rollups(user_id)
+        print(f"{user_id}: {written} rollup documents")
+    print(f"Rebuilt daily rollups for {len(user_ids)} user(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+
+ALLOWED_OUTCOMES = {"done", "missed"}
+
+
+@dataclass
+class TaskEventCreate:
+    user_id: str
+    task_id: str
+    outcome: str  # done | missed
+    minutes: int | None = None  # defaults to the task's estimatedMinutes
+    scheduled_date: str = ""  # YYYY-MM-DD, defaults to today
+
+    def to_doc(self, task_doc: dict, now: datetime):
+        minutes = self.minutes if self.minutes is not None else int(task_doc.get("estimatedMinutes") or 0)
+        return {
+            "userId": self.user_id,
+            "taskId": self.task_id,
+            "subjectId": task_doc.get("subjectId", ""),
+            "estimatedMinutes": task_doc.get("estimatedMinutes"),
+            "difficulty": task_doc.get("difficulty", "medium"),
+            "outcome": self.outcome,
+            "minutes": max(0, minutes),
+            "scheduledDate": self.scheduled_date or date.today().isoformat(),
+            "createdAt": now,
+        }
+
+    def task_update(self, now: datetime):
+        if self.outcome == "done":
+            return {"$set": {"status": "done", "updatedAt": now}}
+        return {
+            "$set": {"status": "missed", "updatedAt": now, "lastMissedAt": now},
+            "$inc": {"missedCount": 1},
+        }
+
+    def missed_notification(self, task_doc: dict, scheduled_date: str, now: datetime):
+        return {
+            "userId": self.user_id,
+            "type": "missed_alert",
+            "title": "Missed task",
+            "body": f"You missed \"{task_doc.get('topic', 'Task')}\" on {scheduled_date}.",
+            "taskId": self.task_id,
+            "scheduledDate": scheduled_date,
+            "read": False,
+            "createdAt": now,
+        }
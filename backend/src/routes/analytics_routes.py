@@ -2,11 +2,13 @@ from flask import Blueprint, request
 
 from src.services.analytics_service import get_analytics_summary
 from src.services.auth_middleware import require_auth
+from src.services.request_instrumentation import query_budget
 
 analytics_bp = Blueprint("analytics", __name__)
 
 
 @analytics_bp.get("/summary")
+@query_budget(3)  # users lookup (auth) + two aggregations
 @require_auth
 def summary():
     data = get_analytics_summary(request.user["id"])
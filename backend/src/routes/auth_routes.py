@@ -1,14 +1,22 @@
+from datetime import datetime, timezone
+
 from flask import Blueprint, request
 
 from src.db.mongo import get_db
 from src.models.user_model import UserCreate
 from src.services.auth_middleware import require_auth
 from src.services.jwt_service import create_access_token
-from src.services.password_service import hash_password, verify_password
+from src.services.password_service import HashingPoolBusy, hash_password, needs_rehash, verify_password
 
 # Blueprint
 auth_bp = Blueprint("auth", __name__)
 
+
+@auth_bp.errorhandler(HashingPoolBusy)
+def hashing_busy(_e):
+    return {"message": "Server is busy, please try again shortly"}, 503, {"Retry-After": "1"}
+
+
 # -----------------------------
 # Register
 # POST /auth/register
@@ -69,7 +77,17 @@ def login():
     if not verify_password(password, user.get("passwordHash", "")):
         return {"message": "Invalid credentials"}, 401
 
-    token = create_access_token(str(user["_id"]))
+    # Transparently upgrade hashes made with an older BCRYPT_ROUNDS
+    if needs_rehash(user.get("passwordHash", "")):
+        try:
+            db.users.update_one(
+                {"_id": user["_id"]},
+                {"$set": {"passwordHash": hash_password(password), "updatedAt": datetime.now(timezone.utc)}},
+            )
+        except HashingPoolBusy:
+            pass  # try again on a later login
+
+    token = create_access_token(str(user["_id"]), name=user.get("name", ""), email=user.get("email", ""))
 
     return {
         "token": token,
@@ -1,7 +1,7 @@
 from flask import Blueprint, request
 
 from src.services.auth_middleware import require_auth
-from src.services.ml_service import get_productivity_patterns
+from src.services.ml_service import get_model_cache_stats, get_productivity_patterns
 
 ml_bp = Blueprint("ml", __name__)
 
@@ -15,3 +15,14 @@ def patterns():
     """
     data = get_productivity_patterns(request.user["id"])
     return {"ok": True, **data}
+
+
+@ml_bp.get("/model-cache")
+@require_auth
+def model_cache():
+    """
+    Duration-model cache counters for this worker process
+    (hits = in-process LRU, misses = solved from the statistics stored in
+    `ml_models`, rebuilds = statistics recomputed from task_events).
+    """
+    return {"ok": True, "cache": get_model_cache_stats()}
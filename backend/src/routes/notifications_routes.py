@@ -10,6 +10,8 @@ from src.services.scheduler_service import get_latest_schedule
 
 notifications_bp = Blueprint("notifications", __name__)
 
+NOTIFICATION_SORT = [("createdAt", -1)]
+
 
 def _compute_reminder(user_id: str):
     """Study reminder from latest schedule: today's planned tasks."""
@@ -39,7 +41,7 @@ def list_notifications():
     db = get_db()
     docs = list(
         db.notifications.find({"userId": request.user["id"]})
-        .sort("createdAt", -1)
+        .sort(NOTIFICATION_SORT)
         .limit(50)
     )
     items = [
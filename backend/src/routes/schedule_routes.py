@@ -1,12 +1,33 @@
-from datetime import date, datetime, timezone
-
-from bson import ObjectId
+from datetime import date
 
 from flask import Blueprint, request
 
-from src.db.mongo import get_db
 from src.services.auth_middleware import require_auth
-from src.services.scheduler_service import GenerateScheduleInput, generate_and_store_schedule, get_latest_schedule
+from src.services.event_service import (
+    MAX_EVENT_BATCH,
+    TaskNotFound,
+    parse_event,
+    record_task_event,
+    record_task_events,
+)
+from src.services.idempotency_service import committed_state, idempotent, mark_committed
+from src.services.regen_service import (
+    SCHEDULE_ASYNC_REGEN,
+    async_enabled,
+    enqueue_regeneration,
+    get_job,
+    get_regen_stats,
+    regenerate_schedule,
+)
+from src.services.request_instrumentation import query_budget
+from src.services.scheduler_service import (
+    MAX_SIMULATION_SCENARIOS,
+    GenerateScheduleInput,
+    SimulateScheduleInput,
+    generate_and_store_schedule,
+    get_latest_schedule,
+    simulate_schedules,
+)
 
 schedule_bp = Blueprint("schedule", __name__)
 
@@ -37,6 +58,45 @@ def generate_schedule():
     return {"ok": True, "schedule": schedule}
 
 
+@schedule_bp.post("/simulate")
+@require_auth
+def simulate_schedule():
+    """
+    Dry run: compare daily budgets (and start dates) without storing anything.
+
+    Body:
+      - dailyStudyMinutes: [number, ...]
+      - startDates: ["YYYY-MM-DD", ...] (optional; defaults to today)
+    Every budget is evaluated for every start date.
+    """
+    body = request.get_json(silent=True) or {}
+    budgets = body.get("dailyStudyMinutes")
+    start_dates = body.get("startDates") or [date.today().isoformat()]
+
+    if not isinstance(budgets, list) or not budgets:
+        return {"message": "dailyStudyMinutes must be a non-empty list"}, 400
+    if not isinstance(start_dates, list):
+        return {"message": "startDates must be a list"}, 400
+    if len(budgets) * len(start_dates) > MAX_SIMULATION_SCENARIOS:
+        return {"message": f"At most {MAX_SIMULATION_SCENARIOS} scenarios per call"}, 400
+
+    try:
+        daily_budgets = [int(b) for b in budgets if not isinstance(b, bool)]
+    except (TypeError, ValueError):
+        daily_budgets = []
+    if len(daily_budgets) != len(budgets) or any(b <= 0 for b in daily_budgets):
+        return {"message": "dailyStudyMinutes must be a list of positive numbers"}, 400
+    try:
+        starts = [date.fromisoformat(s.strip()).isoformat() for s in start_dates]
+    except (AttributeError, ValueError):
+        return {"message": "startDates must be YYYY-MM-DD dates"}, 400
+
+    scenarios = simulate_schedules(
+        SimulateScheduleInput(user_id=request.user["id"], daily_budgets=daily_budgets, start_dates=starts)
+    )
+    return {"ok": True, "scenarios": scenarios}
+
+
 @schedule_bp.get("/latest")
 @require_auth
 def latest_schedule():
@@ -44,8 +104,64 @@ def latest_schedule():
     return {"schedule": latest}
 
 
+@schedule_bp.get("/jobs/<job_id>")
+@require_auth
+def schedule_job(job_id):
+    """Status of a background regeneration (queued | running | done | failed)."""
+    job = get_job(request.user["id"], job_id)
+    if not job:
+        return {"message": "Job not found"}, 404
+    return {"job": job}
+
+
+@schedule_bp.get("/regen-stats")
+@require_auth
+def regen_stats():
+    """
+    Event-triggered regeneration counters for this worker process
+    (requests = regenerations asked for, generations = actually run,
+    repairs = generations served by patching the latest plan,
+    coalesced = requests that shared another one's generation).
+    """
+    return {"ok": True, "regen": get_regen_stats()}
+
+
+def _regenerate_after_events(user_id: str, event: dict | None = None, **extra):
+    """
+    Auto-regenerate the schedule using the latest settings (if available),
+    otherwise defaults. With SCHEDULE_ASYNC_REGEN=1 or a `Prefer: respond-async`
+    header the regeneration runs in the background: 202 with a job id to poll
+    at GET /api/schedule/jobs/<id>.
+    """
+    latest = get_latest_schedule(user_id) or {}
+    daily_minutes = int(latest.get("dailyStudyMinutes") or 120)
+    start_date = date.today().isoformat()
+
+    wants_async = SCHEDULE_ASYNC_REGEN or "respond-async" in request.headers.get("Prefer", "")
+    if wants_async and async_enabled():
+        job_id = enqueue_regeneration(user_id, start_date, daily_minutes)
+        return (
+            {"ok": True, **extra, "jobId": job_id, "status": "queued"},
+            202,
+            {"Location": f"/api/schedule/jobs/{job_id}"},
+        )
+
+    # Coalesced with concurrent events for this user (see regen_service)
+    schedule = regenerate_schedule(
+        GenerateScheduleInput(
+            user_id=user_id,
+            start_date=start_date,
+            daily_study_minutes=daily_minutes,
+        ),
+        event=event,
+    )
+    return {"ok": True, **extra, "schedule": schedule}
+
+
 @schedule_bp.post("/events")
+@query_budget(40)  # event writes + rollups + a full regeneration
 @require_auth
+@idempotent
 def schedule_event():
     """
     Phase 6 (Adaptive):
@@ -56,84 +172,68 @@ def schedule_event():
       - outcome: "done" | "missed"
       - minutes: number (optional, recommended for accurate analytics)
       - scheduledDate: "YYYY-MM-DD" (optional; defaults to today)
+
+    Send an `Idempotency-Key` header to make retries safe: a repeated key
+    replays the first response instead of recording the outcome again.
     """
+    committed = committed_state()
+    if committed is not None:
+        # Retry of a request that recorded the outcome, then failed regenerating
+        return _regenerate_after_events(request.user["id"], event=committed["event"])
+
     body = request.get_json(silent=True) or {}
-    task_id = (body.get("taskId") or "").strip()
-    outcome = (body.get("outcome") or "").strip().lower()
-    minutes = body.get("minutes")
-    scheduled_date = (body.get("scheduledDate") or "").strip()
-
-    if not task_id:
-        return {"message": "taskId is required"}, 400
-    if outcome not in {"done", "missed"}:
-        return {"message": "outcome must be done or missed"}, 400
-
-    db = get_db()
-    now = datetime.now(timezone.utc)
-
-    update = {"$set": {"updatedAt": now}}
-    if outcome == "done":
-        update = {"$set": {"status": "done", "updatedAt": now}}
-    else:
-        update = {
-            "$set": {"status": "missed", "updatedAt": now, "lastMissedAt": now},
-            "$inc": {"missedCount": 1},
-        }
-
-    res = db.tasks.update_one(
-        {"_id": ObjectId(task_id), "userId": request.user["id"]},
-        update,
-    )
-    if res.matched_count == 0:
+    try:
+        ev = parse_event(request.user["id"], body)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+
+    try:
+        event = record_task_event(ev)
+    except TaskNotFound:
         return {"message": "Task not found"}, 404
+    mark_committed({"event": event})
 
-    # Record event (for analytics and ML training)
-    task_doc = db.tasks.find_one(
-        {"_id": ObjectId(task_id)},
-        {"subjectId": 1, "estimatedMinutes": 1, "difficulty": 1, "topic": 1},
-    )
-    event_minutes = int(minutes) if minutes is not None else int((task_doc or {}).get("estimatedMinutes") or 0)
-    if not scheduled_date:
-        scheduled_date = date.today().isoformat()
-
-    if outcome == "missed":
-        db.notifications.insert_one({
-            "userId": request.user["id"],
-            "type": "missed_alert",
-            "title": "Missed task",
-            "body": f"You missed \"{(task_doc or {}).get('topic', 'Task')}\" on {scheduled_date}.",
-            "taskId": task_id,
-            "scheduledDate": scheduled_date,
-            "read": False,
-            "createdAt": now,
-        })
-
-    db.task_events.insert_one(
-        {
-            "userId": request.user["id"],
-            "taskId": task_id,
-            "subjectId": (task_doc or {}).get("subjectId", ""),
-            "estimatedMinutes": (task_doc or {}).get("estimatedMinutes"),
-            "difficulty": (task_doc or {}).get("difficulty", "medium"),
-            "outcome": outcome,
-            "minutes": max(0, event_minutes),
-            "scheduledDate": scheduled_date,
-            "createdAt": now,
-        }
-    )
+    return _regenerate_after_events(request.user["id"], event=event)
 
-    # Auto-regenerate schedule using latest settings (if available), otherwise defaults
-    latest = get_latest_schedule(request.user["id"]) or {}
-    daily_minutes = int(latest.get("dailyStudyMinutes") or 120)
-    start_date = date.today().isoformat()
 
-    schedule = generate_and_store_schedule(
-        GenerateScheduleInput(
-            user_id=request.user["id"],
-            start_date=start_date,
-            daily_study_minutes=daily_minutes,
-        )
-    )
+@schedule_bp.post("/events/batch")
+@query_budget(60)  # fixed-size batch writes + one regeneration
+@require_auth
+@idempotent
+def schedule_events_batch():
+    """
+    Record many task outcomes (offline replay, LMS sync) and regenerate once.
 
-    return {"ok": True, "schedule": schedule}
+    Body:
+      - events: [{taskId, outcome, minutes?, scheduledDate?}, ...]  (1..MAX_EVENT_BATCH)
+
+    Events are applied in order. Nothing is written if any event is invalid
+    (400) or names an unknown task (404); `errors` lists them by index.
+    """
+    committed = committed_state()
+    if committed is not None:
+        return _regenerate_after_events(request.user["id"], recorded=committed["recorded"])
+
+    body = request.get_json(silent=True) or {}
+    raw_events = body.get("events")
+    if not isinstance(raw_events, list) or not raw_events:
+        return {"message": "events must be a non-empty list"}, 400
+    if len(raw_events) > MAX_EVENT_BATCH:
+        return {"message": f"At most {MAX_EVENT_BATCH} events per batch"}, 400
+
+    events, errors = [], []
+    for i, raw in enumerate(raw_events):
+        try:
+            events.append(parse_event(request.user["id"], raw if isinstance(raw, dict) else {}))
+        except ValueError as e:
+            errors.append({"index": i, "message": str(e)})
+    if errors:
+        return {"message": "Invalid events", "errors": errors}, 400
+
+    try:
+        record_task_events(request.user["id"], events)
+    except TaskNotFound as e:
+        return {"message": "Task not found", "errors": [{"index": i, "message": "Task not found"} for i in e.indexes]}, 404
+    mark_committed({"recorded": len(events)})
 
+    return _regenerate_after_events(request.user["id"], recorded=len(events))
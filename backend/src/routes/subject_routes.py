@@ -7,13 +7,15 @@ from src.services.auth_middleware import require_auth
 
 subject_bp = Blueprint("subjects", __name__)
 
+SUBJECT_SORT = [("name", 1)]
+
 
 @subject_bp.get("")
 @require_auth
 def list_subjects():
     db = get_db()
     docs = list(
-        db.subjects.find({"userId": request.user["id"]}).sort("name", 1)
+        db.subjects.find({"userId": request.user["id"]}).sort(SUBJECT_SORT)
     )
     return {
         "items": [{"id": str(d["_id"]), "name": d.get("name", "")} for d in docs]
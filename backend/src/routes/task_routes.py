@@ -1,6 +1,9 @@
+import base64
+import json
 from datetime import datetime, timezone
 
 from bson import ObjectId
+from bson.errors import InvalidId
 from flask import Blueprint, request
 
 from src.db.mongo import get_db
@@ -10,38 +13,131 @@ from src.services.auth_middleware import require_auth
 task_bp = Blueprint("tasks", __name__)
 
 
-def _to_task_response(doc):
+# API field name -> document field
+TASK_FIELDS = {
+    "id": "_id",
+    "subjectId": "subjectId",
+    "topic": "topic",
+    "difficulty": "difficulty",
+    "estimatedMinutes": "estimatedMinutes",
+    "deadline": "deadline",
+    "status": "status",
+    "missedCount": "missedCount",
+}
+TASK_DEFAULTS = {
+    "subjectId": "",
+    "topic": "",
+    "difficulty": "medium",
+    "estimatedMinutes": 0,
+    "deadline": "",
+    "status": "pending",
+    "missedCount": 0,
+}
+# Listing order; keyset pagination walks this exact key (covered by the
+# (userId, deadline, difficulty, createdAt, _id) index)
+TASK_SORT = [("deadline", 1), ("difficulty", -1), ("createdAt", 1), ("_id", 1)]
+MAX_PAGE_SIZE = 500
+
+
+def _to_task_response(doc, fields=None):
+    out = {"id": str(doc["_id"])}
+    for name in fields or TASK_DEFAULTS:
+        if name != "id":
+            out[name] = doc.get(TASK_FIELDS[name], TASK_DEFAULTS[name])
+    return out
+
+
+def _encode_cursor(doc) -> str:
+    created = doc.get("createdAt")
+    key = [doc.get("deadline"), doc.get("difficulty"), created.isoformat() if created else None, str(doc["_id"])]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+
+def task_list_query(user_id: str, status: str | None = None, subject_id: str | None = None, after: dict | None = None) -> dict:
+    """Filter behind GET /api/tasks (sorted by TASK_SORT); `after` is a decoded cursor."""
+    query = {"userId": user_id}
+    if status:
+        query["status"] = status
+    if subject_id:
+        query["subjectId"] = subject_id
+    if after:
+        query.update(after)
+    return query
+
+
+def _decode_cursor(token: str) -> dict:
+    """Keyset filter for documents strictly after the cursor in TASK_SORT order."""
+    deadline, difficulty, created, oid = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    created = datetime.fromisoformat(created) if created else None
+    oid = ObjectId(oid)
     return {
-        "id": str(doc["_id"]),
-        "subjectId": doc.get("subjectId", ""),
-        "topic": doc.get("topic", ""),
-        "difficulty": doc.get("difficulty", "medium"),
-        "estimatedMinutes": doc.get("estimatedMinutes", 0),
-        "deadline": doc.get("deadline", ""),
-        "status": doc.get("status", "pending"),
-        "missedCount": doc.get("missedCount", 0),
+        "$or": [
+            {"deadline": {"$gt": deadline}},
+            {"deadline": deadline, "difficulty": {"$lt": difficulty}},
+            {"deadline": deadline, "difficulty": difficulty, "createdAt": {"$gt": created}},
+            {"deadline": deadline, "difficulty": difficulty, "createdAt": created, "_id": {"$gt": oid}},
+        ]
     }
 
 
 @task_bp.get("")
 @require_auth
 def list_tasks():
+    """
+    Query params (all optional):
+      - status, subjectId: filters
+      - limit: page size (1..500); without it every matching task is returned
+      - after: `nextCursor` from the previous page
+      - fields: comma-separated subset of task fields to return (id is always included)
+    """
     status = request.args.get("status")
     subject_id = request.args.get("subjectId")
-
-    query = {"userId": request.user["id"]}
-    if status:
-        if status not in ALLOWED_STATUS:
-            return {"message": "Invalid status filter"}, 400
-        query["status"] = status
-    if subject_id:
-        query["subjectId"] = subject_id
+    limit = request.args.get("limit")
+    after = request.args.get("after")
+    fields = request.args.get("fields")
+
+    if status and status not in ALLOWED_STATUS:
+        return {"message": "Invalid status filter"}, 400
+
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            return {"message": "limit must be an integer"}, 400
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return {"message": f"limit must be between 1 and {MAX_PAGE_SIZE}"}, 400
+
+    after_filter = None
+    if after:
+        try:
+            after_filter = _decode_cursor(after)
+        except (ValueError, TypeError, InvalidId):
+            return {"message": "Invalid cursor"}, 400
+
+    if fields:
+        fields = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in fields if f not in TASK_FIELDS]
+        if unknown:
+            return {"message": f"Unknown fields: {', '.join(unknown)}"}, 400
+    else:
+        fields = list(TASK_DEFAULTS)
+    # Sort keys are always projected so the last document can become the cursor
+    projection = {TASK_FIELDS[f]: 1 for f in fields}
+    projection.update({k: 1 for k, _ in TASK_SORT})
 
     db = get_db()
-    docs = list(
-        db.tasks.find(query).sort([("deadline", 1), ("difficulty", -1), ("createdAt", 1)])
-    )
-    return {"items": [_to_task_response(d) for d in docs]}
+    query = task_list_query(request.user["id"], status, subject_id, after_filter)
+    cursor = db.tasks.find(query, projection).sort(TASK_SORT)
+    if limit is not None:
+        cursor = cursor.limit(limit + 1)
+    docs = list(cursor)
+
+    next_cursor = None
+    if limit is not None and len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = _encode_cursor(docs[-1])
+
+    return {"items": [_to_task_response(d, fields) for d in docs], "nextCursor": next_cursor}
 
 
 @task_bp.post("")
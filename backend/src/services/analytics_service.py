@@ -2,10 +2,15 @@ from __future__ import annotations
 
 from datetime import date, datetime, timedelta, timezone
 
-from bson import ObjectId
+from pymongo import UpdateOne
 
 from src.db.mongo import get_db
 
+# `date` values of the special documents kept next to the daily rollups:
+# per-subject all-time totals, and the user's streak state (subjectId "")
+ALL_TIME = "all"
+STREAK = "streak"
+
 
 def _iso(d: date) -> str:
     return d.isoformat()
@@ -15,108 +20,372 @@ def _today_utc_date() -> date:
     return datetime.now(timezone.utc).date()
 
 
-def get_analytics_summary(user_id: str):
+def _rollup_increments(event: dict) -> dict:
+    if event.get("outcome") == "done":
+        return {"minutes": int(event.get("minutes") or 0), "doneCount": 1}
+    return {"missedCount": 1}
+
+
+def _parse_day(s: str) -> date | None:
+    try:
+        return date.fromisoformat(s)
+    except (TypeError, ValueError):
+        return None
+
+
+# Runs of consecutive study days kept on the streak document (newest last);
+# older runs only leave their length behind in `longest`
+STREAK_RUNS_KEPT = 30
+
+
+def _runs(days: list) -> list:
+    """Sorted distinct days -> [[start, end], ...] runs of consecutive days."""
+    runs = []
+    for d in days:
+        if runs and d == runs[-1][1] + timedelta(days=1):
+            runs[-1][1] = d
+        else:
+            runs.append([d, d])
+    return runs
+
+
+def _run_days(run: list, until: date) -> int:
+    """Days of the run up to and including `until`."""
+    return max(0, (min(run[1], until) - run[0]).days + 1)
+
+
+def _trim_runs(runs: list, longest: int) -> tuple[list, int]:
+    dropped, runs = runs[:-STREAK_RUNS_KEPT], runs[-STREAK_RUNS_KEPT:]
+    for run in dropped:
+        longest = max(longest, (run[1] - run[0]).days + 1)
+    return runs, longest
+
+
+def _stored_runs(doc: dict) -> list | None:
+    try:
+        return [[date.fromisoformat(a), date.fromisoformat(b)] for a, b in doc["runs"]]
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def streak_key(user_id: str) -> dict:
+    return {"userId": user_id, "date": STREAK, "subjectId": ""}
+
+
+def study_days_query(user_id: str) -> dict:
+    """Day rollups with done minutes (what the streak is made of)."""
+    return {"userId": user_id, "date": {"$nin": [ALL_TIME, STREAK]}, "minutes": {"$gt": 0}}
+
+
+def _streak_fields(runs: list, longest: int) -> dict:
+    return {
+        "runs": [[_iso(a), _iso(b)] for a, b in runs],
+        "longest": longest,
+        "updatedAt": datetime.now(timezone.utc),
+    }
+
+
+def _streak_days(streak_doc: dict, today: date) -> tuple[int, int]:
+    """
+    (current, longest) as of `today`: current is the run of consecutive days
+    ending today with any done minutes > 0. Days after today (logged ahead
+    of time) count once they arrive.
+    """
+    runs = _stored_runs(streak_doc) or []
+    current = next((_run_days(run, today) for run in runs if run[0] <= today <= run[1]), 0)
+    longest = max([int(streak_doc.get("longest") or 0)] + [_run_days(run, today) for run in runs])
+    return current, longest
+
+
+def rebuild_streak(user_id: str) -> dict:
+    """
+    Recompute the streak document from the user's daily rollups.
+    Only needed for back-dated sessions that land before the stored runs.
+    """
     db = get_db()
+    rows = db.daily_rollups.find(study_days_query(user_id), {"_id": 0, "date": 1})
+    days = sorted({d for d in (_parse_day(r.get("date")) for r in rows) if d})
+    runs, longest = _trim_runs(_runs(days), 0)
 
-    total_tasks = db.tasks.count_documents({"userId": user_id})
-    done_tasks = db.tasks.count_documents({"userId": user_id, "status": "done"})
-    pending_tasks = db.tasks.count_documents({"userId": user_id, "status": {"$ne": "done"}})
+    fields = _streak_fields(runs, longest)
+    db.daily_rollups.update_one(streak_key(user_id), {"$set": fields}, upsert=True)
+    return fields
 
-    completion_percent = 0
-    if total_tasks > 0:
-        completion_percent = round((done_tasks / total_tasks) * 100, 1)
 
-    # Weekly minutes (last 7 days incl today) from "done" events
-    today = _today_utc_date()
-    start = today - timedelta(days=6)
+def _record_study_day(user_id: str, day_iso: str):
+    """
+    O(1) streak update for a day that now has done minutes. The document
+    keeps the latest runs of consecutive days, future-dated ones included
+    (sessions logged ahead of their plan day), so the streak can be read for
+    any "today". A day inside a run is a no-op, a day next to one extends
+    (or joins) runs; a day before the oldest kept run falls back to
+    `rebuild_streak`.
+    """
+    day = _parse_day(day_iso)
+    if day is None:
+        return
 
-    events = list(
-        db.task_events.find(
-            {
-                "userId": user_id,
-                "outcome": "done",
-                "scheduledDate": {"$gte": _iso(start), "$lte": _iso(today)},
-            },
-            {"scheduledDate": 1, "minutes": 1},
+    db = get_db()
+    key = streak_key(user_id)
+    for _ in range(3):
+        doc = db.daily_rollups.find_one(key)
+        runs = _stored_runs(doc or {})
+        if not runs or day < runs[0][0]:
+            break
+
+        # Last run starting on or before the day (exists: day >= runs[0] start)
+        i = max(j for j, run in enumerate(runs) if run[0] <= day)
+        if day <= runs[i][1]:
+            return
+        if day == runs[i][1] + timedelta(days=1):
+            runs[i][1] = day
+        else:
+            i += 1
+            runs.insert(i, [day, day])
+        if i + 1 < len(runs) and runs[i + 1][0] == runs[i][1] + timedelta(days=1):
+            runs[i][1] = runs.pop(i + 1)[1]
+
+        runs, longest = _trim_runs(runs, int(doc.get("longest") or 0))
+        res = db.daily_rollups.update_one(
+            {**key, "runs": doc["runs"]},
+            {"$set": _streak_fields(runs, longest)},
         )
+        if res.modified_count:
+            return
+    rebuild_streak(user_id)
+
+
+def record_event_rollup(user_id: str, event: dict):
+    """
+    Fold one task event into daily_rollups: the (userId, date, subjectId) day
+    document and the subject's all-time total, in a single bulk write, then
+    advance the streak if this was a done session with minutes.
+    """
+    db = get_db()
+    inc = _rollup_increments(event)
+    now = datetime.now(timezone.utc)
+    subject_id = event.get("subjectId") or ""
+    db.daily_rollups.bulk_write(
+        [
+            UpdateOne(
+                {"userId": user_id, "date": day, "subjectId": subject_id},
+                {"$inc": inc, "$set": {"updatedAt": now}},
+                upsert=True,
+            )
+            for day in (event.get("scheduledDate") or "", ALL_TIME)
+        ],
+        ordered=False,
     )
+    if inc.get("minutes", 0) > 0:
+        _record_study_day(user_id, event.get("scheduledDate") or "")
 
-    minutes_by_day = {_iso(start + timedelta(days=i)): 0 for i in range(7)}
-    for e in events:
-        day = e.get("scheduledDate")
-        if day in minutes_by_day:
-            minutes_by_day[day] += int(e.get("minutes") or 0)
 
-    last7_labels = list(minutes_by_day.keys())
-    last7_minutes = [minutes_by_day[d] for d in last7_labels]
-    weekly_minutes = sum(last7_minutes)
+def record_event_rollups(user_id: str, events: list):
+    """
+    Batch form of `record_event_rollup`: increments are summed per
+    (date, subjectId) document first, then written in one bulk write.
+    A batch spanning several study days recomputes the streak once.
+    """
+    totals = {}
+    study_days = set()
+    for event in events:
+        inc = _rollup_increments(event)
+        subject_id = event.get("subjectId") or ""
+        for day in (event.get("scheduledDate") or "", ALL_TIME):
+            total = totals.setdefault((day, subject_id), {})
+            for k, v in inc.items():
+                total[k] = total.get(k, 0) + v
+        if inc.get("minutes", 0) > 0:
+            study_days.add(event.get("scheduledDate") or "")
+    if not totals:
+        return
 
-    # Streak: consecutive days ending today with any done minutes > 0
-    streak = 0
-    cursor = today
-    while True:
-        day_iso = _iso(cursor)
-        if minutes_by_day.get(day_iso, 0) > 0:
-            streak += 1
-            cursor = cursor - timedelta(days=1)
-            if cursor < start:
-                # extend beyond 7 days by querying as needed
-                # To keep complexity reasonable, we extend up to 60 days total.
-                if streak >= 60:
-                    break
-                start = start - timedelta(days=7)
-                more = list(
-                    db.task_events.find(
-                        {
-                            "userId": user_id,
-                            "outcome": "done",
-                            "scheduledDate": {"$gte": _iso(start), "$lte": _iso(cursor)},
-                        },
-                        {"scheduledDate": 1, "minutes": 1},
-                    )
-                )
-                for i in range(7):
-                    k = _iso(start + timedelta(days=i))
-                    if k not in minutes_by_day:
-                        minutes_by_day[k] = 0
-                for e in more:
-                    day = e.get("scheduledDate")
-                    if day in minutes_by_day:
-                        minutes_by_day[day] += int(e.get("minutes") or 0)
-            continue
-        break
-
-    # Subject-wise minutes (all-time) from done events
+    db = get_db()
+    now = datetime.now(timezone.utc)
+    db.daily_rollups.bulk_write(
+        [
+            UpdateOne(
+                {"userId": user_id, "date": day, "subjectId": subject_id},
+                {"$inc": inc, "$set": {"updatedAt": now}},
+                upsert=True,
+            )
+            for (day, subject_id), inc in totals.items()
+        ],
+        ordered=False,
+    )
+    if len(study_days) == 1:
+        _record_study_day(user_id, study_days.pop())
+    elif study_days:
+        rebuild_streak(user_id)
+
+
+def rebuild_rollups(user_id: str) -> int:
+    """Recompute a user's daily_rollups from task_events. Returns documents written."""
+    db = get_db()
     pipeline = [
-        {"$match": {"userId": user_id, "outcome": "done"}},
-        {"$group": {"_id": "$subjectId", "minutes": {"$sum": "$minutes"}}},
-        {"$sort": {"minutes": -1}},
-        {"$limit": 10},
+        {"$match": {"userId": user_id}},
+        {
+            "$group": {
+                "_id": {"date": "$scheduledDate", "subjectId": "$subjectId"},
+                "minutes": {"$sum": {"$cond": [{"$eq": ["$outcome", "done"]}, "$minutes", 0]}},
+                "doneCount": {"$sum": {"$cond": [{"$eq": ["$outcome", "done"]}, 1, 0]}},
+                "missedCount": {"$sum": {"$cond": [{"$eq": ["$outcome", "missed"]}, 1, 0]}},
+            }
+        },
     ]
-    subject_minutes = list(db.task_events.aggregate(pipeline))
-    subject_ids = [s["_id"] for s in subject_minutes if s.get("_id")]
-
-    subjects = list(
-        db.subjects.find(
-            {"_id": {"$in": [ObjectId(sid) for sid in subject_ids]}},
-            {"name": 1},
-        )
+    now = datetime.now(timezone.utc)
+    docs, totals = [], {}
+    for g in db.task_events.aggregate(pipeline):
+        subject_id = g["_id"].get("subjectId") or ""
+        day = g["_id"].get("date") or ""
+        counts = {k: int(g.get(k) or 0) for k in ("minutes", "doneCount", "missedCount")}
+        # Events from before scheduledDate was validated may carry a non-date
+        # (even "all"); they still count towards the all-time totals
+        if _parse_day(day) is not None:
+            docs.append({"userId": user_id, "date": day, "subjectId": subject_id, **counts, "updatedAt": now})
+        total = totals.setdefault(subject_id, dict.fromkeys(counts, 0))
+        for k, v in counts.items():
+            total[k] += v
+    docs.extend(
+        {"userId": user_id, "date": ALL_TIME, "subjectId": sid, **counts, "updatedAt": now}
+        for sid, counts in totals.items()
     )
-    subject_name_by_id = {str(s["_id"]): s.get("name", "") for s in subjects}
 
+    db.daily_rollups.delete_many({"userId": user_id})
+    if docs:
+        db.daily_rollups.insert_many(docs)
+    rebuild_streak(user_id)
+    return len(docs)
+
+
+def task_counts_pipeline(user_id: str) -> list:
+    return [
+        {"$match": {"userId": user_id}},
+        {
+            "$facet": {
+                "total": [{"$count": "n"}],
+                "done": [{"$match": {"status": "done"}}, {"$count": "n"}],
+            }
+        },
+    ]
+
+
+def _task_counts(db, user_id: str) -> dict:
+    res = next(db.tasks.aggregate(task_counts_pipeline(user_id)), {})
+    total = (res.get("total") or [{}])[0].get("n", 0)
+    done = (res.get("done") or [{}])[0].get("n", 0)
+    return {"total": total, "done": done, "pending": total - done}
+
+
+def rollup_facets_pipeline(user_id: str, start: date, today: date) -> list:
+    """
+    Daily minutes for [start, today], the streak document and the top
+    subjects (with names) from daily_rollups in a single aggregation.
+    """
+    return [
+        {
+            "$match": {
+                "userId": user_id,
+                "$or": [
+                    {"date": {"$gte": _iso(start), "$lte": _iso(today)}, "minutes": {"$gt": 0}},
+                    {"date": ALL_TIME, "doneCount": {"$gt": 0}},
+                    {"date": STREAK, "subjectId": ""},
+                ],
+            }
+        },
+        {
+            "$facet": {
+                "days": [
+                    {"$match": {"date": {"$nin": [ALL_TIME, STREAK]}}},
+                    {"$group": {"_id": "$date", "minutes": {"$sum": "$minutes"}}},
+                ],
+                "streak": [
+                    {"$match": {"date": STREAK}},
+                    {"$project": {"_id": 0, "runs": 1, "longest": 1}},
+                ],
+                "subjects": [
+                    {"$match": {"date": ALL_TIME}},
+                    {"$sort": {"minutes": -1}},
+                    {"$limit": 10},
+                    {
+                        "$lookup": {
+                            "from": "subjects",
+                            "let": {"sid": "$subjectId"},
+                            "pipeline": [
+                                {
+                                    "$match": {
+                                        "$expr": {
+                                            "$eq": [
+                                                "$_id",
+                                                {"$convert": {"input": "$$sid", "to": "objectId", "onError": None, "onNull": None}},
+                                            ]
+                                        }
+                                    }
+                                },
+                                {"$project": {"_id": 0, "name": {"$ifNull": ["$name", ""]}}},
+                            ],
+                            "as": "subject",
+                        }
+                    },
+                    {
+                        "$project": {
+                            "_id": 0,
+                            "subjectId": 1,
+                            "minutes": 1,
+                            "subjectName": {"$ifNull": [{"$arrayElemAt": ["$subject.name", 0]}, "Unknown"]},
+                        }
+                    },
+                ],
+            }
+        },
+    ]
+
+
+def _rollup_facets(db, user_id: str, start: date, today: date) -> dict:
+    return next(db.daily_rollups.aggregate(rollup_facets_pipeline(user_id, start, today)), {})
+
+
+def get_analytics_summary(user_id: str):
+    """
+    Dashboard summary in two roundtrips: one aggregation over tasks and one
+    $facet aggregation over daily_rollups.
+    """
+    db = get_db()
+
+    tasks = _task_counts(db, user_id)
+
+    completion_percent = 0
+    if tasks["total"] > 0:
+        completion_percent = round((tasks["done"] / tasks["total"]) * 100, 1)
+
+    # Weekly minutes (last 7 days incl today) from pre-aggregated rollups
+    today = _today_utc_date()
+    start = today - timedelta(days=6)
+
+    facets = _rollup_facets(db, user_id, start, today)
+    minutes_by_day = {d["_id"]: int(d.get("minutes") or 0) for d in facets.get("days") or []}
+
+    last7_labels = [_iso(start + timedelta(days=i)) for i in range(7)]
+    last7_minutes = [minutes_by_day.get(d, 0) for d in last7_labels]
+    weekly_minutes = sum(last7_minutes)
+
+    # Streak: maintained incrementally on event write
+    streak, longest_streak = _streak_days((facets.get("streak") or [{}])[0], today)
+
+    # Subject-wise minutes (all-time) from the per-subject running totals
     subject_chart = [
-        {"subjectId": sm["_id"], "subjectName": subject_name_by_id.get(sm["_id"], "Unknown"), "minutes": int(sm["minutes"])}
-        for sm in subject_minutes
+        {"subjectId": sm.get("subjectId", ""), "subjectName": sm["subjectName"], "minutes": int(sm.get("minutes") or 0)}
+        for sm in facets.get("subjects") or []
     ]
 
     return {
-        "tasks": {"total": total_tasks, "done": done_tasks, "pending": pending_tasks},
+        "tasks": tasks,
         "completionPercent": completion_percent,
         "streakDays": streak,
+        "longestStreakDays": longest_streak,
         "weeklyMinutes": weekly_minutes,
         "charts": {
             "last7Days": {"labels": last7_labels, "minutes": last7_minutes},
             "subjectMinutesTop": subject_chart,
         },
     }
-
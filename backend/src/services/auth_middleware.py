@@ -1,11 +1,91 @@
+import os
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
 
 from bson import ObjectId
 from flask import request
 
 from src.db.mongo import get_db
+from src.services.metrics_service import count_cache
 from src.services.jwt_service import decode_token
 
+# Verified identities keyed by user id, so bursts of authenticated calls
+# don't each re-read the users collection. TTL 0 disables the cache.
+# Entries only expire (TTL): no route changes a user's name/email or deletes
+# users, and a per-process cache can't be invalidated across workers anyway.
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+# Trust name/email claims in the (signed) token and never hit the users collection
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS") == "1"
+
+_identity_cache: OrderedDict = OrderedDict()  # user_id -> (expires_at, identity)
+_identity_cache_lock = threading.Lock()
+_identity_cache_stats = {"hits": 0, "misses": 0, "claims": 0}
+
+
+def get_auth_cache_stats() -> dict:
+    with _identity_cache_lock:
+        stats = dict(_identity_cache_stats)
+        stats["size"] = len(_identity_cache)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hitRatio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def _cached_identity(user_id: str):
+    now = time.monotonic()
+    with _identity_cache_lock:
+        entry = _identity_cache.get(user_id)
+        if entry is not None and entry[0] > now:
+            _identity_cache.move_to_end(user_id)
+            _identity_cache_stats["hits"] += 1
+            hit = entry[1]
+        else:
+            _identity_cache_stats["misses"] += 1
+            hit = None
+    count_cache("auth", "hit" if hit is not None else "miss")
+    return hit
+
+
+def _cache_identity(user_id: str, identity: dict):
+    if AUTH_CACHE_TTL_SECONDS <= 0:
+        return
+    with _identity_cache_lock:
+        _identity_cache[user_id] = (time.monotonic() + AUTH_CACHE_TTL_SECONDS, identity)
+        _identity_cache.move_to_end(user_id)
+        while len(_identity_cache) > AUTH_CACHE_SIZE:
+            _identity_cache.popitem(last=False)
+
+
+def _load_identity(payload: dict):
+    user_id = payload["sub"]
+
+    if AUTH_TRUST_TOKEN_CLAIMS and "email" in payload and "name" in payload:
+        with _identity_cache_lock:
+            _identity_cache_stats["claims"] += 1
+        count_cache("auth", "claims")
+        return {"id": user_id, "email": payload["email"], "name": payload["name"]}
+
+    if AUTH_CACHE_TTL_SECONDS > 0:
+        identity = _cached_identity(user_id)
+        if identity is not None:
+            return identity
+
+    db = get_db()
+    user = db.users.find_one({"_id": ObjectId(user_id)}, {"name": 1, "email": 1})
+    if not user:
+        return None
+
+    identity = {
+        "id": str(user["_id"]),
+        "email": user.get("email", ""),
+        "name": user.get("name", ""),
+    }
+    _cache_identity(user_id, identity)
+    return identity
+
 
 def _get_bearer_token():
     auth = request.headers.get("Authorization", "")
@@ -20,6 +100,9 @@ def require_auth(fn):
       - id (str)
       - email (str)
       - name (str)
+
+    The identity comes from the in-process cache (AUTH_CACHE_TTL_SECONDS),
+    the token claims (AUTH_TRUST_TOKEN_CLAIMS=1) or the users collection.
     """
 
     @wraps(fn)
@@ -37,17 +120,12 @@ def require_auth(fn):
         if not user_id:
             return {"message": "Invalid token payload"}, 401
 
-        db = get_db()
-        user = db.users.find_one({"_id": ObjectId(user_id)}, {"passwordHash": 0})
-        if not user:
+        identity = _load_identity(payload)
+        if not identity:
             return {"message": "User not found"}, 401
 
-        request.user = {
-            "id": str(user["_id"]),
-            "email": user.get("email", ""),
-            "name": user.get("name", ""),
-        }
+        # Copy so handlers can't mutate the cached entry
+        request.user = dict(identity)
         return fn(*args, **kwargs)
 
     return wrapper
-
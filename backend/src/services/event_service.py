@@ -0,0 +1,129 @@
+"""
+Recording task outcomes: task status, missed-task notification, the
+`task_events` row, daily rollups and ML statistics. Schedule regeneration is
+left to the caller (once per request, see regen_service).
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from src.db.mongo import get_db
+from src.models.task_event_model import ALLOWED_OUTCOMES, TaskEventCreate
+from src.services.analytics_service import record_event_rollup, record_event_rollups
+from src.services.ml_service import record_done_event, record_done_events
+
+MAX_EVENT_BATCH = 1000
+
+_TASK_PROJECTION = {"subjectId": 1, "estimatedMinutes": 1, "difficulty": 1, "topic": 1}
+
+
+class TaskNotFound(LookupError):
+    def __init__(self, indexes: list[int]):
+        super().__init__("Task not found")
+        self.indexes = indexes
+
+
+def parse_event(user_id: str, body: dict) -> TaskEventCreate:
+    """Validate one event payload; raises ValueError with a client-facing message."""
+    task_id = body.get("taskId") or ""
+    outcome = body.get("outcome") or ""
+    minutes = body.get("minutes")
+
+    if not isinstance(task_id, str) or not task_id.strip():
+        raise ValueError("taskId is required")
+    task_id = task_id.strip()
+    if not ObjectId.is_valid(task_id):
+        raise ValueError("taskId is invalid")
+    if not isinstance(outcome, str) or outcome.strip().lower() not in ALLOWED_OUTCOMES:
+        raise ValueError("outcome must be done or missed")
+    outcome = outcome.strip().lower()
+    if minutes is not None:
+        try:
+            minutes = int(minutes)
+        except (TypeError, ValueError):
+            raise ValueError("minutes must be a number")
+    # Stored as the rollup `date` key, so only real days (normalised) get through
+    scheduled_date = body.get("scheduledDate") or ""
+    if scheduled_date:
+        try:
+            scheduled_date = date.fromisoformat(scheduled_date.strip()).isoformat()
+        except (AttributeError, ValueError):
+            raise ValueError("scheduledDate must be a YYYY-MM-DD date")
+
+    return TaskEventCreate(
+        user_id=user_id,
+        task_id=task_id,
+        outcome=outcome,
+        minutes=minutes,
+        scheduled_date=scheduled_date,
+    )
+
+
+def record_task_event(ev: TaskEventCreate) -> dict:
+    """Record one outcome. Raises TaskNotFound if the task isn't the user's."""
+    db = get_db()
+    now = datetime.now(timezone.utc)
+
+    res = db.tasks.update_one({"_id": ObjectId(ev.task_id), "userId": ev.user_id}, ev.task_update(now))
+    if res.matched_count == 0:
+        raise TaskNotFound([0])
+
+    # Record event (for analytics and ML training)
+    task_doc = db.tasks.find_one({"_id": ObjectId(ev.task_id)}, _TASK_PROJECTION) or {}
+    event = ev.to_doc(task_doc, now)
+
+    if ev.outcome == "missed":
+        db.notifications.insert_one(ev.missed_notification(task_doc, event["scheduledDate"], now))
+
+    db.task_events.insert_one(event)
+    record_event_rollup(ev.user_id, event)
+    if ev.outcome == "done":
+        # New training sample: update duration-model statistics (invalidates cached model)
+        record_done_event(ev.user_id, event)
+    return event
+
+
+def record_task_events(user_id: str, events: list[TaskEventCreate]) -> list[dict]:
+    """
+    Record a batch of outcomes in a fixed number of roundtrips: one task
+    lookup, one ordered bulk write of task updates (so repeated outcomes for a
+    task apply in order), one insert_many each for notifications and events,
+    then the rollup and ML statistics batch updates.
+    Raises TaskNotFound (with the offending indexes) before writing anything
+    if any task isn't the user's.
+    """
+    db = get_db()
+    now = datetime.now(timezone.utc)
+
+    oids = {ev.task_id: ObjectId(ev.task_id) for ev in events}
+    task_docs = {
+        str(doc["_id"]): doc
+        for doc in db.tasks.find({"_id": {"$in": list(oids.values())}, "userId": user_id}, _TASK_PROJECTION)
+    }
+    missing = [i for i, ev in enumerate(events) if ev.task_id not in task_docs]
+    if missing:
+        raise TaskNotFound(missing)
+
+    db.tasks.bulk_write(
+        [UpdateOne({"_id": oids[ev.task_id], "userId": user_id}, ev.task_update(now)) for ev in events],
+        ordered=True,
+    )
+
+    docs = [ev.to_doc(task_docs[ev.task_id], now) for ev in events]
+    notifications = [
+        ev.missed_notification(task_docs[ev.task_id], doc["scheduledDate"], now)
+        for ev, doc in zip(events, docs)
+        if ev.outcome == "missed"
+    ]
+    if notifications:
+        db.notifications.insert_many(notifications)
+
+    # insert_many adds _id to the dicts; analytics/ML only read the event fields
+    db.task_events.insert_many(docs)
+    record_event_rollups(user_id, docs)
+    record_done_events(user_id, [doc for doc in docs if doc["outcome"] == "done"])
+    return docs
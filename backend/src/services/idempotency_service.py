@@ -0,0 +1,177 @@
+"""
+Idempotency-Key support for retried writes.
+
+The first request with a given key claims it in `idempotency_keys` and its
+response is stored there; retries with the same key get that response back
+(`Idempotent-Replayed: true`) from a single indexed upsert, without touching
+tasks, events or the schedule again. Keys expire after a day (TTL index, see
+src/db/migrate.py).
+
+A claim is a lease of IDEMPOTENCY_LEASE_SECONDS: while it runs, retries get a
+409, and once it has lapsed (the worker died mid-request) a retry takes the
+key over. A request that fails releases its key unless the view called
+`mark_committed` first: then its writes stay recorded, and a retry runs the
+view again with `committed_state()` so it only redoes the work after them
+(e.g. the schedule regeneration after an event was recorded).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from bson import ObjectId
+from flask import g, make_response, request
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from src.db.mongo import get_db
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+# Longer than any request takes; a claim older than this is a dead worker's
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "30"))
+# Response headers worth replaying (e.g. the job URL of a 202)
+_REPLAYED_HEADERS = ("Location", "Retry-After")
+
+
+def _fingerprint() -> str:
+    h = hashlib.sha256()
+    h.update(f"{request.method} {request.path}\n".encode("utf-8"))
+    h.update(request.get_data(cache=True))
+    return h.hexdigest()
+
+
+def _claim(user_id: str, key: str, fingerprint: str, lease_id: ObjectId) -> dict | None:
+    """Claim the key; returns the existing record if someone already holds it."""
+    db = get_db()
+    now = datetime.now(timezone.utc)
+    query = {"userId": user_id, "key": key}
+    claim = {
+        "$setOnInsert": {
+            "fingerprint": fingerprint,
+            "status": "processing",
+            "leaseId": lease_id,
+            "leaseUntil": now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS),
+            "createdAt": now,
+        }
+    }
+    try:
+        return db.idempotency_keys.find_one_and_update(
+            query, claim, upsert=True, return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        # Lost a concurrent upsert race: the other request holds the key
+        return db.idempotency_keys.find_one(query)
+
+
+def _held(claim: dict) -> dict:
+    # Only while this request still holds the lease
+    return {"userId": claim["userId"], "key": claim["key"], "leaseId": claim["leaseId"]}
+
+
+def _take_over(existing: dict, lease_id: ObjectId) -> bool:
+    """Re-claim a key whose lease has lapsed; False if it is still held."""
+    now = datetime.now(timezone.utc)
+    res = get_db().idempotency_keys.update_one(
+        {
+            "userId": existing["userId"],
+            "key": existing["key"],
+            "status": "processing",
+            # Nobody else took it over meanwhile, and the lease is over
+            "leaseId": existing.get("leaseId"),
+            "leaseUntil": {"$not": {"$gt": now}},
+        },
+        {"$set": {"leaseId": lease_id, "leaseUntil": now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)}},
+    )
+    return res.modified_count == 1
+
+
+def mark_committed(state: dict):
+    """
+    Record that this request's writes are done. A later failure then keeps
+    the key, and a retry gets `state` back from `committed_state()` instead
+    of writing again. No-op without an Idempotency-Key.
+    """
+    claim = g.get("idempotency_claim")
+    if claim is None:
+        return
+    get_db().idempotency_keys.update_one(_held(claim), {"$set": {"committed": state}})
+    claim["committed"] = state
+
+
+def committed_state() -> dict | None:
+    """What `mark_committed` stored, when this request retries one that failed after it."""
+    claim = g.get("idempotency_claim")
+    return claim.get("committed") if claim is not None else None
+
+
+def _release(claim: dict):
+    db = get_db()
+    query = _held(claim)
+    if claim.get("committed") is None:
+        # Nothing was written; let the client retry for real
+        db.idempotency_keys.delete_one(query)
+    else:
+        # Keep the recorded writes, hand the key to the next retry right away
+        db.idempotency_keys.update_one(query, {"$set": {"leaseUntil": datetime.now(timezone.utc)}})
+
+
+def idempotent(fn):
+    """
+    Replay the stored response for a repeated Idempotency-Key.
+    Apply below @require_auth (keys are scoped per user).
+    """
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (request.headers.get(IDEMPOTENCY_HEADER) or "").strip()
+        if not key:
+            return fn(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return {"message": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters"}, 400
+
+        user_id = request.user["id"]
+        fingerprint = _fingerprint()
+        lease_id = ObjectId()
+        existing = _claim(user_id, key, fingerprint, lease_id)
+        if existing is not None:
+            if existing.get("fingerprint") != fingerprint:
+                return {"message": f"{IDEMPOTENCY_HEADER} was already used for a different request"}, 422
+            if existing.get("status") == "done":
+                headers = dict(existing.get("headers") or {})
+                headers["Idempotent-Replayed"] = "true"
+                return existing.get("body") or {}, existing.get("statusCode", 200), headers
+            if not _take_over(existing, lease_id):
+                return {"message": "A request with this key is still in progress"}, 409, {"Retry-After": "1"}
+
+        committed = existing.get("committed") if existing is not None else None
+        g.idempotency_claim = claim = {"userId": user_id, "key": key, "leaseId": lease_id, "committed": committed}
+        try:
+            response = make_response(fn(*args, **kwargs))
+        except Exception:
+            _release(claim)
+            raise
+
+        if response.status_code >= 500:
+            # Not a final answer
+            _release(claim)
+            return response
+
+        get_db().idempotency_keys.update_one(
+            {"userId": user_id, "key": key},
+            {
+                "$set": {
+                    "status": "done",
+                    "statusCode": response.status_code,
+                    "body": response.get_json(silent=True),
+                    "headers": {h: response.headers[h] for h in _REPLAYED_HEADERS if h in response.headers},
+                    "completedAt": datetime.now(timezone.utc),
+                }
+            },
+        )
+        return response
+
+    return wrapper
@@ -1,10 +1,12 @@
+from __future__ import annotations
+
 import os
 from datetime import datetime, timedelta, timezone
 
 import jwt
 
 
-def create_access_token(user_id: str):
+def create_access_token(user_id: str, name: str | None = None, email: str | None = None):
     secret = os.getenv("JWT_SECRET", "change_me")
     expires_minutes = int(os.getenv("JWT_EXPIRES_MINUTES", "10080"))
     now = datetime.now(timezone.utc)
@@ -13,6 +15,11 @@ def create_access_token(user_id: str):
         "iat": int(now.timestamp()),
         "exp": int((now + timedelta(minutes=expires_minutes)).timestamp()),
     }
+    # Optional identity claims so require_auth can skip the users lookup
+    if name is not None:
+        payload["name"] = name
+    if email is not None:
+        payload["email"] = email
     return jwt.encode(payload, secret, algorithm="HS256")
 
 
@@ -0,0 +1,120 @@
+"""
+Prometheus metrics served as text on /api/metrics.
+
+Under gunicorn, point PROMETHEUS_MULTIPROC_DIR at an empty writable directory:
+every worker then writes its samples to files there and a scrape of any
+worker aggregates all of them (gunicorn.conf.py clears the directory on start
+and marks exited workers dead). Without it, each process reports only itself.
+"""
+
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from flask import Response, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Route latency",
+    ["blueprint", "endpoint", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUEST_ERRORS = Counter(
+    "http_request_errors_total",
+    "Responses with status >= 400",
+    ["blueprint", "endpoint", "status"],
+)
+SCHEDULE_GENERATION = Histogram(
+    "schedule_generation_seconds",
+    "generate_and_store_schedule duration",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+ML_FIT = Histogram(
+    "ml_fit_seconds",
+    "Model fit duration",
+    ["model"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0),
+)
+ML_FIT_SAMPLES = Histogram(
+    "ml_fit_samples",
+    "Training samples per model fit",
+    ["model"],
+    buckets=(5, 10, 50, 100, 500, 1000, 5000, 10000, 50000),
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by result; hit ratio = hit / sum by cache",
+    ["cache", "result"],
+)
+
+# Label lookups take a lock and hash the label tuple; resolve each child once
+_children: dict = {}
+_children_lock = threading.Lock()
+
+
+def _child(metric, *labels):
+    key = (metric, labels)
+    child = _children.get(key)
+    if child is None:
+        with _children_lock:
+            child = _children.setdefault(key, metric.labels(*labels))
+    return child
+
+
+def observe_request(blueprint: str, endpoint: str, method: str, status: int, seconds: float):
+    _child(REQUEST_LATENCY, blueprint, endpoint, method).observe(seconds)
+    if status >= 400:
+        _child(REQUEST_ERRORS, blueprint, endpoint, str(status)).inc()
+
+
+def observe_fit(model: str, seconds: float, n_samples: int):
+    _child(ML_FIT, model).observe(seconds)
+    _child(ML_FIT_SAMPLES, model).observe(n_samples)
+
+
+def count_cache(cache: str, result: str):
+    _child(CACHE_LOOKUPS, cache, result).inc()
+
+
+def render_metrics() -> Response:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+# Set by the before hook, read once by the after hook. A ContextVar instead
+# of `g`, and a single `request` resolution below: every proxy attribute
+# lookup costs about as much as the histogram observation itself.
+_request_started: ContextVar[float | None] = ContextVar("metrics_request_started", default=None)
+
+
+def _before():
+    _request_started.set(time.perf_counter())
+
+
+def _after(response):
+    started = _request_started.get()
+    if started is not None:
+        # Threads are reused across requests: never let a later one read this
+        _request_started.set(None)
+        req = request._get_current_object()
+        observe_request(
+            req.blueprint or "app",
+            req.endpoint or "unmatched",
+            req.method,
+            response.status_code,
+            time.perf_counter() - started,
+        )
+    return response
+
+
+def init_metrics(app):
+    """Route latency histograms and error counts for every request."""
+    app.before_request(_before)
+    app.after_request(_after)
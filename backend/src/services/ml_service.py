@@ -2,23 +2,43 @@
 Phase 8: ML service — explainable, simple models.
 
 - Linear Regression: predict actual study time from estimatedMinutes, difficulty, subject history.
+  Solved in closed form from per-user sufficient statistics kept in `ml_models`.
 - K-Means: cluster productivity patterns (minutes, day-of-week) for insights.
+
+NumPy and scikit-learn are imported inside the functions that need them, so
+the API can boot and serve auth routes without paying for the ML stack.
+Call `warm_up()` to load them ahead of the first request.
 """
 
 from __future__ import annotations
 
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta, timezone
 
-import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.linear_model import LinearRegression
+from pymongo.errors import DuplicateKeyError
 
 from src.db.mongo import get_db
+from src.services.metrics_service import count_cache, observe_fit
 
 DIFFICULTY_ENCODING = {"low": 1, "medium": 2, "high": 3}
 MIN_SAMPLES_LR = 5
 MIN_SAMPLES_KMEANS = 4
 N_CLUSTERS = 3
+MODEL_CACHE_SIZE = int(os.getenv("ML_MODEL_CACHE_SIZE", "1024"))
+EVENT_BATCH_SIZE = 1000
+# Above this many sessions, pattern clustering updates the previous centers incrementally
+PATTERNS_INCREMENTAL_MIN_SAMPLES = int(os.getenv("ML_PATTERNS_INCREMENTAL_MIN_SAMPLES", "2000"))
+DURATION_FEATURE_FIELDS = {"estimatedMinutes": 1, "difficulty": 1, "subjectId": 1, "minutes": 1}
+
+
+def warm_up():
+    """Import the ML stack now instead of on first use (e.g. in a pre-fork master)."""
+    import numpy  # noqa: F401
+    from sklearn.cluster import KMeans  # noqa: F401
 
 
 def _iso(d: date) -> str:
@@ -32,122 +52,385 @@ def _day_of_week(s: str) -> int:
         return 0
 
 
-def _subject_avg(events: list, subject_id: str) -> float:
-    mins = [int(e.get("minutes") or 0) for e in events if e.get("subjectId") == subject_id and e.get("outcome") == "done"]
-    return float(np.mean(mins)) if mins else 0.0
+def done_events_query(user_id: str, since: datetime | None = None) -> dict:
+    """The user's done task_events (training history), optionally only newer ones."""
+    query = {"userId": user_id, "outcome": "done"}
+    if since is not None:
+        query["createdAt"] = {"$gt": since}
+    return query
 
 
-def get_predicted_minutes(task_doc: dict, user_id: str) -> tuple[int | None, str | None]:
+def _iter_done_events(user_id: str, projection: dict, since: datetime | None = None):
     """
-    Linear Regression prediction for how long this task will realistically take.
-    Returns (predicted_minutes, explain_str) or (None, None) if not enough data.
+    Stream the user's done task_events from a projected cursor in fixed-size
+    batches, so history is never materialised as one list.
     """
     db = get_db()
-    events = list(
-        db.task_events.find(
-            {"userId": user_id, "outcome": "done"},
-            {"estimatedMinutes": 1, "difficulty": 1, "subjectId": 1, "minutes": 1},
-        )
+    return db.task_events.find(
+        done_events_query(user_id, since),
+        {"_id": 0, **projection},
+        batch_size=EVENT_BATCH_SIZE,
     )
 
+
+# --------------------------------------------------
+# Sufficient statistics for the duration regression
+# --------------------------------------------------
+# Features per sample: x = [estimatedMinutes, difficulty, subjectAvg], target y = minutes.
+# subjectAvg is the same for every sample of a subject, so keeping per-subject sums
+# of e, d, y and their products is enough to rebuild XᵀX and Xᵀy exactly in
+# O(subjects), whatever the current subject averages are.
+NO_SUBJECT_KEY = "_none"
+STAT_FIELDS = ("minutesSum", "minutesCount", "n", "e", "d", "y", "ee", "ed", "dd", "ey", "dy")
+
+
+def _stats_key(subject_id: str) -> str:
+    return subject_id or NO_SUBJECT_KEY
+
+
+def _event_increments(event: dict) -> dict:
+    """Per-subject statistic increments contributed by one done event."""
+    inc = {"minutesSum": int(event.get("minutes") or 0), "minutesCount": 1}
+
     # Need estimatedMinutes and minutes for training; skip events missing them
-    samples = []
+    est = event.get("estimatedMinutes")
+    actual = event.get("minutes")
+    if est is None or actual is None:
+        return inc
+    try:
+        est = int(est)
+        actual = int(actual)
+    except (TypeError, ValueError):
+        return inc
+    if est <= 0:
+        return inc
+
+    diff = (event.get("difficulty") or "medium").lower()
+    d = DIFFICULTY_ENCODING.get(diff, 2)
+    inc.update({
+        "n": 1,
+        "e": est,
+        "d": d,
+        "y": actual,
+        "ee": est * est,
+        "ed": est * d,
+        "dd": d * d,
+        "ey": est * actual,
+        "dy": d * actual,
+    })
+    return inc
+
+
+def build_duration_stats(events) -> dict:
+    """
+    Per-subject statistics from an iterable of done task_events.
+    Single pass with O(subjects) memory, so it can consume a cursor directly.
+    """
+    stats = {}
     for e in events:
-        est = e.get("estimatedMinutes")
-        actual = e.get("minutes")
-        if est is None or actual is None:
-            continue
-        try:
-            est = int(est)
-            actual = int(actual)
-        except (TypeError, ValueError):
-            continue
-        if est <= 0:
-            continue
-        diff = (e.get("difficulty") or "medium").lower()
-        diff_enc = DIFFICULTY_ENCODING.get(diff, 2)
-        subj = e.get("subjectId") or ""
-        subj_avg = _subject_avg(events, subj) if subj else 0.0
-        if subj_avg == 0 and subj:
-            subj_avg = float(actual)  # fallback to self for singleton
-        samples.append((est, diff_enc, subj_avg, actual))
-
-    if len(samples) < MIN_SAMPLES_LR:
-        return None, None
+        bucket = stats.setdefault(_stats_key(e.get("subjectId") or ""), dict.fromkeys(STAT_FIELDS, 0))
+        for k, v in _event_increments(e).items():
+            bucket[k] += v
+    return stats
+
 
-    X = np.array([[s[0], s[1], s[2]] for s in samples], dtype=float)
-    y = np.array([s[3] for s in samples], dtype=float)
+def record_done_event(user_id: str, event: dict):
+    """
+    Fold a newly inserted done event into the user's statistics in O(1) and
+    bump the history version so cached models are invalidated. Once the
+    schema-5 migration has stored every user's statistics, these increments
+    see every done event, so they are complete from the first one on.
+    """
+    prefix = f"stats.{_stats_key(event.get('subjectId') or '')}."
+    inc = {prefix + k: v for k, v in _event_increments(event).items()}
+    inc["historyVersion"] = 1
 
-    model = LinearRegression()
-    model.fit(X, y)
+    db = get_db()
+    db.ml_models.update_one(
+        {"userId": user_id},
+        {"$inc": inc, "$set": {"statsReady": True, "updatedAt": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+
+def record_done_events(user_id: str, events: list):
+    """Batch form of `record_done_event`: one update for many done events."""
+    if not events:
+        return
+    inc = {
+        f"stats.{key}.{k}": v
+        for key, bucket in build_duration_stats(events).items()
+        for k, v in bucket.items()
+        if v
+    }
+    inc["historyVersion"] = len(events)
+
+    db = get_db()
+    db.ml_models.update_one(
+        {"userId": user_id},
+        {"$inc": inc, "$set": {"statsReady": True, "updatedAt": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
 
+
+def rebuild_duration_stats(user_id: str) -> tuple[int, dict]:
+    """
+    Recompute the user's statistics from task_events and store them (the
+    migration and src/db/rebuild_ml_stats). Returns (history_version, stats).
+    The write is skipped if a done event was counted during the scan, but an
+    event inserted and not yet counted would be counted twice: don't run it
+    while the user's events are being recorded.
+    """
+    db = get_db()
+    state = db.ml_models.find_one({"userId": user_id}, {"historyVersion": 1}) or {}
+    version = int(state.get("historyVersion") or 0)
+
+    stats = build_duration_stats(_iter_done_events(user_id, DURATION_FEATURE_FIELDS))
+    update = {"$set": {"stats": stats, "statsReady": True, "updatedAt": datetime.now(timezone.utc)}}
+    try:
+        if state:
+            db.ml_models.update_one({"userId": user_id, "historyVersion": version}, update)
+        else:
+            update["$setOnInsert"] = {"historyVersion": version}
+            db.ml_models.update_one({"userId": user_id}, update, upsert=True)
+    except DuplicateKeyError:
+        pass
+    return version, stats
+
+
+@dataclass
+class DurationModel:
+    """
+    Duration regression for one user at one history version.
+    coef is None when there were fewer than MIN_SAMPLES_LR samples.
+    """
+
+    version: int
+    n_samples: int
+    coef: list[float] | None = None
+    intercept: float = 0.0
+    subject_avg: dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_stats(cls, version: int, stats: dict) -> "DurationModel":
+        """
+        Closed-form least squares with intercept, equivalent to
+        sklearn's LinearRegression().fit(X, y) (minimum-norm solution of the
+        centered problem when features are collinear).
+        """
+        import numpy as np
+
+        xtx = np.zeros((4, 4))  # columns: [1, est, difficulty, subjectAvg]
+        xty = np.zeros(4)
+        subject_avg = {}
+        for key, s in stats.items():
+            a = 0.0
+            if key != NO_SUBJECT_KEY and s.get("minutesCount"):
+                a = s["minutesSum"] / s["minutesCount"]
+                subject_avg[key] = a
+            n = s.get("n") or 0
+            if not n:
+                continue
+            e, d, y = s["e"], s["d"], s["y"]
+            xtx += np.array([
+                [n, e, d, a * n],
+                [e, s["ee"], s["ed"], a * e],
+                [d, s["ed"], s["dd"], a * d],
+                [a * n, a * e, a * d, a * a * n],
+            ], dtype=float)
+            xty += np.array([y, s["ey"], s["dy"], a * y], dtype=float)
+
+        n_samples = int(xtx[0, 0])
+        if n_samples < MIN_SAMPLES_LR:
+            return cls(version=version, n_samples=n_samples, subject_avg=subject_avg)
+
+        x_mean = xtx[0, 1:] / n_samples
+        y_mean = xty[0] / n_samples
+        sxx = xtx[1:, 1:] - n_samples * np.outer(x_mean, x_mean)
+        sxy = xty[1:] - n_samples * x_mean * y_mean
+        coef = np.linalg.pinv(sxx, rcond=1e-10, hermitian=True) @ sxy
+        intercept = y_mean - x_mean @ coef
+
+        return cls(
+            version=version,
+            n_samples=n_samples,
+            coef=[float(c) for c in coef],
+            intercept=float(intercept),
+            subject_avg=subject_avg,
+        )
+
+
+# In-process LRU in front of the `ml_models` collection: user_id -> DurationModel
+_model_cache: OrderedDict[str, DurationModel] = OrderedDict()
+_model_cache_lock = threading.Lock()
+_model_cache_stats = {"hits": 0, "misses": 0, "rebuilds": 0}
+
+
+def _count(stat: str):
+    with _model_cache_lock:
+        _model_cache_stats[stat] += 1
+
+
+def get_model_cache_stats() -> dict:
+    with _model_cache_lock:
+        stats = dict(_model_cache_stats)
+        stats["size"] = len(_model_cache)
+    lookups = stats["hits"] + stats["misses"] + stats["rebuilds"]
+    stats["hitRatio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def get_duration_model(user_id: str) -> DurationModel:
+    """
+    Current duration model for the user.
+    Lookup order: in-process LRU -> solve from stored statistics ->
+    statistics computed from task_events (users without any stored yet).
+    Entries are keyed by the history version bumped on every done event.
+    """
+    db = get_db()
+    state = db.ml_models.find_one({"userId": user_id}, {"historyVersion": 1, "statsReady": 1}) or {}
+    version = int(state.get("historyVersion") or 0)
+
+    with _model_cache_lock:
+        cached = _model_cache.get(user_id)
+        if cached is not None and cached.version == version:
+            _model_cache.move_to_end(user_id)
+            _model_cache_stats["hits"] += 1
+            count_cache("ml_model", "hit")
+            return cached
+
+    doc = db.ml_models.find_one({"userId": user_id, "statsReady": True}, {"historyVersion": 1, "stats": 1})
+    if doc:
+        version = int(doc.get("historyVersion") or 0)
+        stats = doc.get("stats") or {}
+        _count("misses")
+        count_cache("ml_model", "miss")
+    else:
+        # No done event recorded since the migration stored everyone's
+        # statistics. Computed, never stored: an event inserted but not yet
+        # passed to record_done_event would otherwise be counted twice.
+        stats = build_duration_stats(_iter_done_events(user_id, DURATION_FEATURE_FIELDS))
+        _count("rebuilds")
+        count_cache("ml_model", "rebuild")
+
+    t0 = time.perf_counter()
+    model = DurationModel.from_stats(version, stats)
+    observe_fit("duration", time.perf_counter() - t0, model.n_samples)
+    with _model_cache_lock:
+        _model_cache[user_id] = model
+        _model_cache.move_to_end(user_id)
+        while len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+    return model
+
+
+def _task_features(task_doc: dict, model: DurationModel):
     est = int(task_doc.get("estimatedMinutes") or 0)
     if est <= 0:
-        return None, None
+        return None
     diff = (task_doc.get("difficulty") or "medium").lower()
     diff_enc = DIFFICULTY_ENCODING.get(diff, 2)
     subj = task_doc.get("subjectId") or ""
-    subj_avg = _subject_avg(events, subj) if subj else 0.0
+    subj_avg = model.subject_avg.get(subj, 0.0) if subj else 0.0
     if subj_avg == 0:
         subj_avg = float(est)
+    return est, diff, [est, diff_enc, subj_avg]
 
-    x = np.array([[est, diff_enc, subj_avg]], dtype=float)
-    pred = float(model.predict(x)[0])
-    pred = max(1, min(600, round(pred)))  # clamp 1–600 min
 
+def _explain(model: DurationModel, est: int, diff: str, raw: float) -> tuple[int, str]:
+    pred = max(1, min(600, round(float(raw))))  # clamp 1–600 min
     ratio = pred / est if est else 1.0
     explain = (
-        f"ML prediction from {len(samples)} past sessions: "
+        f"ML prediction from {model.n_samples} past sessions: "
         f"estimated {est} min, difficulty {diff} → predicted {pred} min "
         f"({ratio:.0%} of estimate)."
     )
     return pred, explain
 
 
-def get_productivity_patterns(user_id: str) -> dict:
+def predict_minutes_batch(
+    tasks: list, user_id: str, model: DurationModel | None = None
+) -> list[tuple[int | None, str | None]]:
     """
-    K-Means on (minutes, day_of_week) from done task_events.
-    Returns cluster centers and human-readable explanations.
+    Linear Regression predictions for many tasks at once.
+    Uses `model`, or the cached model for the user (see `get_duration_model`),
+    and predicts every task with one matrix-vector product.
+    Returns one (predicted_minutes, explain_str) per task, in order; (None, None)
+    where there is not enough data or the task has no estimate.
     """
-    db = get_db()
-    events = list(
-        db.task_events.find(
-            {"userId": user_id, "outcome": "done"},
-            {"minutes": 1, "scheduledDate": 1},
-        )
-    )
+    import numpy as np
 
-    rows = []
-    for e in events:
-        m = e.get("minutes")
-        d = e.get("scheduledDate")
-        if m is None or not d:
-            continue
-        try:
-            m = int(m)
-        except (TypeError, ValueError):
-            continue
-        if m <= 0:
+    results = [(None, None)] * len(tasks)
+    if not tasks:
+        return results
+
+    if model is None:
+        model = get_duration_model(user_id)
+    if model.coef is None:
+        return results
+
+    rows, positions, meta = [], [], []
+    for i, task_doc in enumerate(tasks):
+        features = _task_features(task_doc, model)
+        if features is None:
             continue
-        rows.append([float(m), float(_day_of_week(d))])
+        est, diff, row = features
+        rows.append(row)
+        positions.append(i)
+        meta.append((est, diff))
 
-    if len(rows) < MIN_SAMPLES_KMEANS:
+    if not rows:
+        return results
+
+    preds = np.array(rows, dtype=float) @ np.array(model.coef, dtype=float) + model.intercept
+    for i, (est, diff), raw in zip(positions, meta, preds.tolist()):
+        results[i] = _explain(model, est, diff, raw)
+    return results
+
+
+def get_predicted_minutes(task_doc: dict, user_id: str) -> tuple[int | None, str | None]:
+    """
+    Linear Regression prediction for how long this task will realistically take.
+    Returns (predicted_minutes, explain_str) or (None, None) if not enough data.
+    For more than one task use `predict_minutes_batch`.
+    """
+    model = get_duration_model(user_id)
+    if model.coef is None:
+        return None, None
+    features = _task_features(task_doc, model)
+    if features is None:
+        return None, None
+    est, diff, row = features
+    raw = sum(c * x for c, x in zip(model.coef, row)) + model.intercept
+    return _explain(model, est, diff, raw)
+
+
+def _pattern_row(e: dict):
+    m = e.get("minutes")
+    d = e.get("scheduledDate")
+    if m is None or not d:
+        return None
+    try:
+        m = int(m)
+    except (TypeError, ValueError):
+        return None
+    if m <= 0:
+        return None
+    return [float(m), float(_day_of_week(d))]
+
+
+def _patterns_response(centers: list, n_samples: int) -> dict:
+    if not centers:
         return {
             "ready": False,
             "explain": "Need at least 4 completed study sessions to detect productivity patterns.",
             "clusters": [],
-            "nSamples": len(rows),
+            "nSamples": n_samples,
         }
 
-    X = np.array(rows)
-    k = min(N_CLUSTERS, max(2, len(rows) // 2))
-    km = KMeans(n_clusters=k, random_state=42, n_init=10)
-    km.fit(X)
-
     day_names = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
     clusters = []
-    for i in range(k):
-        c = km.cluster_centers_[i]
+    for i, c in enumerate(centers):
         avg_min = int(round(c[0]))
         dow = int(round(c[1])) % 7
         clusters.append({
@@ -161,7 +444,7 @@ def get_productivity_patterns(user_id: str) -> dict:
     clusters.sort(key=lambda x: x["avgMinutes"])
 
     explain = (
-        f"From {len(rows)} sessions, we found {k} patterns: "
+        f"From {n_samples} sessions, we found {len(centers)} patterns: "
         + "; ".join(c["label"] for c in clusters)
         + "."
     )
@@ -170,5 +453,111 @@ def get_productivity_patterns(user_id: str) -> dict:
         "ready": True,
         "explain": explain,
         "clusters": clusters,
-        "nSamples": len(rows),
+        "nSamples": n_samples,
     }
+
+
+def _fit_patterns(user_id: str) -> dict:
+    """Full K-Means over the user's whole done history."""
+    import numpy as np
+    from sklearn.cluster import KMeans
+
+    rows = []
+    last_event_at = None
+    for e in _iter_done_events(user_id, {"minutes": 1, "scheduledDate": 1, "createdAt": 1}):
+        created = e.get("createdAt")
+        if created is not None and (last_event_at is None or created > last_event_at):
+            last_event_at = created
+        row = _pattern_row(e)
+        if row is not None:
+            rows.append(row)
+
+    patterns = {"nSamples": len(rows), "lastEventAt": last_event_at, "centers": [], "counts": []}
+    if len(rows) < MIN_SAMPLES_KMEANS:
+        return patterns
+
+    X = np.array(rows)
+    k = min(N_CLUSTERS, max(2, len(rows) // 2))
+    km = KMeans(n_clusters=k, random_state=42, n_init=10)
+    km.fit(X)
+
+    patterns["centers"] = km.cluster_centers_.tolist()
+    patterns["counts"] = np.bincount(km.labels_, minlength=k).tolist()
+    return patterns
+
+
+def _update_patterns(user_id: str, prev: dict) -> dict:
+    """
+    Warm-started online k-means: assign only the events written since the
+    previous fit to the stored centers and move each center by 1/count,
+    the same per-center learning rate MiniBatchKMeans uses. Done here
+    directly because partial_fit cannot be seeded with prior counts.
+    """
+    import numpy as np
+
+    cursor = _iter_done_events(user_id, {"minutes": 1, "scheduledDate": 1, "createdAt": 1}, prev.get("lastEventAt"))
+
+    centers = np.array(prev["centers"], dtype=float)
+    counts = np.array(prev["counts"], dtype=float)
+    n_samples = int(prev.get("nSamples") or 0)
+    last_event_at = prev.get("lastEventAt")
+    for e in cursor:
+        created = e.get("createdAt")
+        if created is not None and (last_event_at is None or created > last_event_at):
+            last_event_at = created
+        row = _pattern_row(e)
+        if row is None:
+            continue
+        x = np.array(row)
+        j = int(np.argmin(((centers - x) ** 2).sum(axis=1)))
+        counts[j] += 1
+        centers[j] += (x - centers[j]) / counts[j]
+        n_samples += 1
+
+    return {
+        "nSamples": n_samples,
+        "lastEventAt": last_event_at,
+        "centers": centers.tolist(),
+        "counts": [int(c) for c in counts],
+    }
+
+
+def get_productivity_patterns(user_id: str) -> dict:
+    """
+    K-Means on (minutes, day_of_week) from done task_events.
+    Returns cluster centers and human-readable explanations.
+
+    Results are cached on the user's `ml_models` document and only recomputed
+    when the history version changes. Past PATTERNS_INCREMENTAL_MIN_SAMPLES
+    sessions, new events are folded into the previous centers instead of
+    re-clustering everything. The response carries `historyVersion` so
+    clients can skip re-rendering unchanged results.
+    """
+    db = get_db()
+    state = db.ml_models.find_one({"userId": user_id}, {"historyVersion": 1, "patterns": 1}) or {}
+    version = int(state.get("historyVersion") or 0)
+    prev = state.get("patterns") or {}
+
+    if prev and prev.get("version") == version:
+        return {**_patterns_response(prev["centers"], prev["nSamples"]), "historyVersion": version}
+
+    t0 = time.perf_counter()
+    if len(prev.get("centers") or []) == N_CLUSTERS and prev["nSamples"] >= PATTERNS_INCREMENTAL_MIN_SAMPLES:
+        patterns = _update_patterns(user_id, prev)
+        observe_fit("patterns_incremental", time.perf_counter() - t0, patterns["nSamples"])
+    else:
+        patterns = _fit_patterns(user_id)
+        observe_fit("patterns", time.perf_counter() - t0, patterns["nSamples"])
+    patterns["version"] = version
+
+    update = {"$set": {"patterns": patterns, "updatedAt": datetime.now(timezone.utc)}}
+    try:
+        if state:
+            db.ml_models.update_one({"userId": user_id, "historyVersion": version}, update)
+        else:
+            update["$setOnInsert"] = {"historyVersion": version}
+            db.ml_models.update_one({"userId": user_id}, update, upsert=True)
+    except DuplicateKeyError:
+        pass
+
+    return {**_patterns_response(patterns["centers"], patterns["nSamples"]), "historyVersion": version}
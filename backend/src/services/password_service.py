@@ -1,11 +1,88 @@
+"""
+bcrypt hashing off the request thread.
+
+Hashing is CPU-bound and holds the worker for the whole bcrypt cost, so it
+runs on a small process pool. The pool is bounded: when HASH_POOL_MAX_PENDING
+hashes are already queued or running, callers get HashingPoolBusy right away
+(routes turn it into a 503) instead of piling up behind a login spike.
+HASH_POOL_WORKERS=0 hashes inline on the calling thread.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+
 import bcrypt
 
+from src.services.process_pool import SpawnPool
 
-def hash_password(password: str) -> str:
-    hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+
+def _default_pool_workers() -> int:
+    # Every web worker has its own pool: share the cores between them
+    web_workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    return max(1, (os.cpu_count() or 1) // web_workers)
+
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(_default_pool_workers())))
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", str(max(1, HASH_POOL_WORKERS) * 4)))
+
+_pool = SpawnPool(lambda: HASH_POOL_WORKERS)
+_slots = threading.BoundedSemaphore(HASH_POOL_MAX_PENDING)
+
+
+class HashingPoolBusy(RuntimeError):
+    """Raised when the hashing pool is saturated."""
+
+
+def _hash(password: str, rounds: int) -> str:
+    hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=rounds))
     return hashed.decode("utf-8")
 
 
-def verify_password(password: str, password_hash: str) -> bool:
+def _verify(password: str, password_hash: str) -> bool:
     return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
 
+
+def configure_pool(workers: int, max_pending: int | None = None):
+    """Resize the hashing pool (shuts the current one down)."""
+    global HASH_POOL_WORKERS, HASH_POOL_MAX_PENDING, _slots
+    shutdown_pool()
+    HASH_POOL_WORKERS = workers
+    HASH_POOL_MAX_PENDING = max_pending or max(1, workers) * 4
+    _slots = threading.BoundedSemaphore(HASH_POOL_MAX_PENDING)
+
+
+def shutdown_pool():
+    _pool.shutdown()
+
+
+def _run(fn, *args):
+    if HASH_POOL_WORKERS <= 0:
+        return fn(*args)
+    slots = _slots
+    if not slots.acquire(blocking=False):
+        raise HashingPoolBusy("Password hashing is saturated, retry shortly")
+    try:
+        return _pool.get().submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_password(password: str) -> str:
+    return _run(_hash, password, BCRYPT_ROUNDS)
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return _run(_verify, password, password_hash)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True when the hash was made with a different cost than BCRYPT_ROUNDS."""
+    # Format: $2b$<cost>$<salt+hash>
+    parts = password_hash.split("$")
+    try:
+        return int(parts[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
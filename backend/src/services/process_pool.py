@@ -0,0 +1,44 @@
+"""
+Process pools for CPU-bound work off the request thread (password hashing,
+background schedule regeneration), started on first use.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+
+class SpawnPool:
+    """
+    A ProcessPoolExecutor created on first use with `max_workers()` workers.
+    Children are spawned, never forked: a forked web worker would copy its
+    Mongo client threads' locks in whatever state they were in.
+    """
+
+    def __init__(self, max_workers: Callable[[], int]):
+        self._max_workers = max_workers
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self._max_workers(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def discard(self):
+        """Forget a broken pool; the next `get` starts a fresh one."""
+        with self._lock:
+            self._pool = None
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
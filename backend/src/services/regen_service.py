@@ -0,0 +1,273 @@
+"""
+Event-triggered schedule regeneration: coalesced per user, inline or in the
+background.
+
+Per user there is at most one regeneration running and one waiting. Requests
+arriving while one waits (debounce window, or behind the running one) join it
+and share its result, so a burst of events costs one or two generations, and
+the waiting one starts only after the running one has stored its schedule.
+Coalescing is per web-worker process. With SCHEDULE_REPAIR=1 an inline flight
+carrying a single event patches the latest plan instead (see
+scheduler_service.repair_schedule), falling back to a full regeneration.
+
+In background mode `POST /api/schedule/events` acknowledges the event right
+away and the (ML-heavy) regeneration runs on a local process pool. Progress is
+tracked in `schedule_jobs` documents (queued -> running -> done | failed),
+which expire after a week (TTL index, see src/db/migrate.py). The newest
+finished job's schedule is what `/api/schedule/latest` returns.
+REGEN_POOL_WORKERS=0 disables background regeneration.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from src.db.mongo import get_db
+from src.services.process_pool import SpawnPool
+from src.services.scheduler_service import GenerateScheduleInput, generate_and_store_schedule, repair_schedule
+
+REGEN_POOL_WORKERS = int(os.getenv("REGEN_POOL_WORKERS", "2"))
+# Regenerate in the background by default (clients can also send `Prefer: respond-async`)
+SCHEDULE_ASYNC_REGEN = os.getenv("SCHEDULE_ASYNC_REGEN") == "1"
+# Wait this long before starting a regeneration so a burst of events folds into it
+SCHEDULE_REGEN_DEBOUNCE_MS = int(os.getenv("SCHEDULE_REGEN_DEBOUNCE_MS", "0"))
+# Patch the latest plan for a single inline event instead of regenerating (see repair_schedule)
+SCHEDULE_REPAIR = os.getenv("SCHEDULE_REPAIR") == "1"
+
+_pool = SpawnPool(lambda: REGEN_POOL_WORKERS)
+
+
+def async_enabled() -> bool:
+    return REGEN_POOL_WORKERS > 0
+
+
+def shutdown_pool():
+    _pool.shutdown()
+
+
+def _set_status(job_id: ObjectId, status: str, **fields):
+    get_db().schedule_jobs.update_one(
+        {"_id": job_id},
+        {"$set": {"status": status, "updatedAt": datetime.now(timezone.utc), **fields}},
+    )
+
+
+def _run_job(job_id: str, user_id: str, start_date: str, daily_minutes: int):
+    """Runs in a pool process: regenerate and record the outcome on the job."""
+    oid = ObjectId(job_id)
+    _set_status(oid, "running", startedAt=datetime.now(timezone.utc))
+    try:
+        schedule = generate_and_store_schedule(
+            GenerateScheduleInput(user_id=user_id, start_date=start_date, daily_study_minutes=daily_minutes)
+        )
+    except Exception as e:
+        _set_status(oid, "failed", error=str(e) or type(e).__name__, finishedAt=datetime.now(timezone.utc))
+        return
+    _set_status(oid, "done", scheduleId=schedule["id"], finishedAt=datetime.now(timezone.utc))
+
+
+class _Flight:
+    """One regeneration; every request that joins it shares its outcome."""
+
+    def __init__(self, key: tuple, inp: GenerateScheduleInput, background: bool):
+        self.key = key
+        self.inp = inp
+        self.events: list = []  # task events folded into this flight (None = unknown)
+        self.started = False
+        self.done = threading.Event()
+        self.result = None
+        self.error: Exception | None = None
+        self.job_id = ObjectId() if background else None
+        # Background flights start once their job document exists and the
+        # flight ahead of them (if any) has finished
+        self.blockers = 1 if background else 0
+
+
+# (mode, user_id) -> [running or debouncing flight, follow-up flight]
+_flights: dict[tuple, list] = {}
+_flights_lock = threading.Lock()
+_regen_stats = {"requests": 0, "generations": 0, "repairs": 0}
+
+
+def get_regen_stats() -> dict:
+    with _flights_lock:
+        stats = dict(_regen_stats)
+    stats["coalesced"] = stats["requests"] - stats["generations"]
+    return stats
+
+
+def _join(inp: GenerateScheduleInput, background: bool, event: dict | None = None) -> tuple[_Flight, _Flight | None, bool]:
+    """
+    Attach to the user's not-yet-started flight, or open one.
+    Returns (flight, flight it must wait for, whether the caller leads it).
+    Joiners bring the latest settings along.
+    """
+    key = ("background" if background else "inline", inp.user_id)
+    with _flights_lock:
+        _regen_stats["requests"] += 1
+        slots = _flights.setdefault(key, [None, None])
+        current, follow_up = slots
+        if current is None:
+            slots[0] = flight = _Flight(key, inp, background)
+            flight.events.append(event)
+            return flight, None, True
+        if not current.started:
+            current.inp = inp
+            current.events.append(event)
+            return current, None, False
+        if follow_up is None:
+            slots[1] = flight = _Flight(key, inp, background)
+            flight.events.append(event)
+            if background:
+                flight.blockers += 1
+            return flight, current, True
+        follow_up.inp = inp
+        follow_up.events.append(event)
+        return follow_up, None, False
+
+
+def _claim(flight: _Flight):
+    with _flights_lock:
+        flight.started = True
+        _regen_stats["generations"] += 1
+
+
+def _finish(flight: _Flight):
+    """Promote the follow-up (if any) and release everyone waiting on `flight`."""
+    with _flights_lock:
+        slots = _flights[flight.key]
+        slots[0], slots[1] = slots[1], None
+        promoted = slots[0]
+        if promoted is None:
+            del _flights[flight.key]
+    flight.done.set()
+    if promoted is not None and promoted.job_id is not None:
+        _release(promoted)
+
+
+def _debounce():
+    if SCHEDULE_REGEN_DEBOUNCE_MS > 0:
+        time.sleep(SCHEDULE_REGEN_DEBOUNCE_MS / 1000)
+
+
+def _regenerate(flight: _Flight) -> dict:
+    # A lone event can usually be patched into the latest plan
+    if SCHEDULE_REPAIR and len(flight.events) == 1 and flight.events[0] is not None:
+        repaired = repair_schedule(flight.inp, flight.events[0])
+        if repaired is not None:
+            with _flights_lock:
+                _regen_stats["repairs"] += 1
+            return repaired
+    return generate_and_store_schedule(flight.inp)
+
+
+def regenerate_schedule(inp: GenerateScheduleInput, event: dict | None = None) -> dict:
+    """
+    Coalesced `generate_and_store_schedule` for event-triggered regenerations.
+    Pass the recorded event so a flight carrying just that one event can be
+    repaired incrementally (SCHEDULE_REPAIR=1).
+    """
+    flight, predecessor, leader = _join(inp, background=False, event=event)
+    if leader:
+        if predecessor is not None:
+            predecessor.done.wait()
+        _debounce()
+        _claim(flight)
+        try:
+            flight.result = _regenerate(flight)
+        except Exception as e:
+            flight.error = e
+        finally:
+            _finish(flight)
+    else:
+        flight.done.wait()
+
+    if flight.error is not None:
+        raise flight.error
+    return flight.result
+
+
+def _on_done(flight: _Flight, future):
+    # The job marks its own failures; this catches the process dying under it
+    # so the job doesn't stay "running" forever.
+    exc = future.exception()
+    if exc is not None:
+        if isinstance(exc, BrokenProcessPool):
+            _pool.discard()
+        _set_status(flight.job_id, "failed", error=str(exc) or type(exc).__name__, finishedAt=datetime.now(timezone.utc))
+    _finish(flight)
+
+
+def _submit(flight: _Flight):
+    _claim(flight)
+    inp = flight.inp
+    try:
+        future = _pool.get().submit(_run_job, str(flight.job_id), inp.user_id, inp.start_date, inp.daily_study_minutes)
+    except RuntimeError as e:  # pool shut down / broken
+        _set_status(flight.job_id, "failed", error=str(e), finishedAt=datetime.now(timezone.utc))
+        _finish(flight)
+        return
+    future.add_done_callback(lambda f: _on_done(flight, f))
+
+
+def _release(flight: _Flight):
+    with _flights_lock:
+        flight.blockers -= 1
+        if flight.blockers > 0:
+            return
+    if SCHEDULE_REGEN_DEBOUNCE_MS > 0:
+        timer = threading.Timer(SCHEDULE_REGEN_DEBOUNCE_MS / 1000, _submit, args=(flight,))
+        timer.daemon = True
+        timer.start()
+    else:
+        _submit(flight)
+
+
+def enqueue_regeneration(user_id: str, start_date: str, daily_minutes: int) -> str:
+    """
+    Queue a background regeneration, or join the user's queued one.
+    Returns the job id.
+    """
+    inp = GenerateScheduleInput(user_id=user_id, start_date=start_date, daily_study_minutes=daily_minutes)
+    flight, _predecessor, leader = _join(inp, background=True)
+    if not leader:
+        return str(flight.job_id)
+
+    now = datetime.now(timezone.utc)
+    get_db().schedule_jobs.insert_one({
+        "_id": flight.job_id,
+        "userId": user_id,
+        "status": "queued",
+        "startDate": start_date,
+        "dailyStudyMinutes": daily_minutes,
+        "createdAt": now,
+        "updatedAt": now,
+    })
+    _release(flight)
+    return str(flight.job_id)
+
+
+def get_job(user_id: str, job_id: str) -> dict | None:
+    try:
+        oid = ObjectId(job_id)
+    except (InvalidId, TypeError):
+        return None
+    doc = get_db().schedule_jobs.find_one({"_id": oid, "userId": user_id})
+    if not doc:
+        return None
+    return {
+        "id": str(doc["_id"]),
+        "status": doc.get("status", "queued"),
+        "scheduleId": doc.get("scheduleId"),
+        "error": doc.get("error"),
+        "createdAt": doc.get("createdAt"),
+        "startedAt": doc.get("startedAt"),
+        "finishedAt": doc.get("finishedAt"),
+    }
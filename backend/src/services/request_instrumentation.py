@@ -0,0 +1,89 @@
+import logging
+import os
+import time
+
+from flask import current_app, g, request
+
+from src.db.monitoring import current_request_commands, start_request_tracking, stop_request_tracking
+
+log = logging.getLogger(__name__)
+
+# Mongo commands a request may issue before it is logged (getMore included)
+REQUEST_QUERY_BUDGET = int(os.getenv("REQUEST_QUERY_BUDGET", "25"))
+# Same command on the same collection this many times in one request looks like N+1
+REQUEST_N_PLUS_ONE_THRESHOLD = int(os.getenv("REQUEST_N_PLUS_ONE_THRESHOLD", "10"))
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+# Raise instead of logging (set app.config["QUERY_BUDGET_STRICT"] = True in tests)
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT") == "1"
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(max_commands: int):
+    """Per-route override of REQUEST_QUERY_BUDGET."""
+
+    def decorator(fn):
+        fn.query_budget = max_commands
+        return fn
+
+    return decorator
+
+
+def _route_budget() -> int:
+    view = current_app.view_functions.get(request.endpoint or "")
+    return getattr(view, "query_budget", REQUEST_QUERY_BUDGET)
+
+
+def _before():
+    g.request_started = time.perf_counter()
+    g.request_tracking = start_request_tracking()
+
+
+def _after(response):
+    tracked = current_request_commands()
+    started = g.get("request_started")
+    if tracked is None or started is None:
+        return response
+
+    total_ms = (time.perf_counter() - started) * 1000
+    g.request_metrics = {"commands": tracked["count"], "dbMs": tracked["dbMs"], "totalMs": total_ms}
+
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = (
+            f'db;dur={tracked["dbMs"]:.2f};desc="{tracked["count"]} queries", app;dur={total_ms:.2f}'
+        )
+
+    route = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+    repeated = [(shape, n) for shape, n in tracked["shapes"].items() if n >= REQUEST_N_PLUS_ONE_THRESHOLD]
+    for (command, collection), n in repeated:
+        log.warning("%s: possible N+1, %s on %s issued %d times", route, command, collection, n)
+
+    budget = _route_budget()
+    if tracked["count"] > budget:
+        message = (
+            f"{route} issued {tracked['count']} Mongo commands (budget {budget}), "
+            f"{tracked['dbMs']:.1f} ms in the database, {total_ms:.1f} ms total"
+        )
+        if QUERY_BUDGET_STRICT or current_app.config.get("QUERY_BUDGET_STRICT"):
+            raise QueryBudgetExceeded(message)
+        log.warning(message)
+    return response
+
+
+def _teardown(_exc):
+    token = g.pop("request_tracking", None)
+    if token is not None:
+        stop_request_tracking(token)
+
+
+def init_request_instrumentation(app):
+    """
+    Per-request Mongo command count and DB time, reported in a Server-Timing
+    header; requests over their query budget (or with repeated identical
+    commands) are logged.
+    """
+    app.before_request(_before)
+    app.after_request(_after)
+    app.teardown_request(_teardown)
@@ -6,11 +6,17 @@ from datetime import date, datetime, timedelta, timezone
 from bson import ObjectId
 
 from src.db.mongo import get_db
-from src.services.ml_service import get_predicted_minutes
+from src.services.metrics_service import SCHEDULE_GENERATION
+from src.services.ml_service import DurationModel, get_duration_model, predict_minutes_batch
 
 
 DIFFICULTY_RANK = {"low": 1, "medium": 2, "high": 3}
 NEAR_DEADLINE_DAYS = 7
+# Safety cap on plan length (the original loop stopped after day index 365)
+MAX_SCHEDULE_DAYS = 366
+MINUTES_PER_DAY = 24 * 60
+# Newest schedule first (the `latest` plan)
+LATEST_SCHEDULE_SORT = [("createdAt", -1)]
 
 
 def _parse_yyyy_mm_dd(s: str) -> date:
@@ -21,6 +27,141 @@ def _to_yyyy_mm_dd(d: date) -> str:
     return d.isoformat()
 
 
+def _schedule_item(t: dict, meta: dict, allocate: int, is_partial: bool) -> dict:
+    return {
+        "taskId": str(t["_id"]),
+        "subjectId": t.get("subjectId", ""),
+        "topic": t.get("topic", ""),
+        "difficulty": (t.get("difficulty") or "medium").lower(),
+        "deadline": t.get("deadline") or "",
+        "estimatedMinutes": t.get("estimatedMinutes"),
+        "minutes": allocate,
+        "isPartial": is_partial,
+        "sourceStatus": t.get("status", "pending"),
+        "missedCount": int(t.get("missedCount") or 0),
+        "minutesSource": meta.get("minutesSource", "estimated"),
+        "mlExplain": meta.get("mlExplain"),
+    }
+
+
+def allocate_days_greedy(tasks: list, task_meta: dict, start: date, daily_minutes: int) -> list:
+    """
+    Reference allocator: walks the sorted task list once per day.
+    O(tasks x days); kept for benchmarking against `allocate_days`.
+    """
+    remaining = {tid: m["minutes"] for tid, m in task_meta.items()}
+    days = []
+    day_index = 0
+
+    # If no tasks, still store an empty schedule
+    while True:
+        if all(m <= 0 for m in remaining.values()):
+            break
+
+        current_date = start + timedelta(days=day_index)
+        day_index += 1
+
+        capacity = daily_minutes
+        items = []
+
+        for t in tasks:
+            if capacity <= 0:
+                break
+
+            task_id = str(t["_id"])
+            rem = remaining.get(task_id, 0)
+            if rem <= 0:
+                continue
+
+            allocate = min(rem, capacity)
+            remaining[task_id] = rem - allocate
+            capacity -= allocate
+
+            items.append(_schedule_item(t, task_meta.get(task_id, {}), allocate, allocate < rem))
+
+        planned_minutes = daily_minutes - capacity
+        days.append(
+            {
+                "date": _to_yyyy_mm_dd(current_date),
+                "plannedMinutes": planned_minutes,
+                "items": items,
+            }
+        )
+
+        # safety to avoid infinite loops if estimatedMinutes were 0
+        if day_index >= MAX_SCHEDULE_DAYS:
+            break
+
+    return days
+
+
+def allocate_days(
+    tasks: list, task_meta: dict, start: date, daily_minutes: int, max_days: int = MAX_SCHEDULE_DAYS
+) -> list:
+    """
+    Cumulative-sum allocator, O(tasks + days).
+
+    Allocation is strictly greedy in sort order, so the plan is the sorted task
+    minutes laid end to end and cut every `daily_minutes`. Each task occupies
+    [cum_start, cum_end) on that line; the days it touches are
+    cum_start // capacity .. (cum_end - 1) // capacity. Output matches
+    `allocate_days_greedy` exactly. `max_days` lowers the safety cap (used
+    when re-flowing the tail of an existing plan).
+    """
+    import numpy as np
+
+    if daily_minutes <= 0:
+        raise ValueError("dailyStudyMinutes must be > 0")
+
+    minutes = np.array(
+        [task_meta.get(str(t["_id"]), {}).get("minutes", 0) for t in tasks],
+        dtype=np.int64,
+    )
+    keep = np.flatnonzero(minutes > 0)
+    if keep.size == 0:
+        return []
+
+    minutes = minutes[keep]
+    ends = np.cumsum(minutes)
+    starts = ends - minutes
+    first_day = starts // daily_minutes
+    last_day = (ends - 1) // daily_minutes
+
+    total = int(ends[-1])
+    n_days = min(int(last_day[-1]) + 1, max_days)
+    day_starts = np.arange(n_days, dtype=np.int64) * daily_minutes
+    planned = np.minimum(daily_minutes, total - day_starts)
+
+    # Tasks starting past the safety cap never make it into the plan
+    cut = int(np.searchsorted(first_day, n_days))
+
+    days = [
+        {
+            "date": _to_yyyy_mm_dd(start + timedelta(days=i)),
+            "plannedMinutes": planned_minutes,
+            "items": [],
+        }
+        for i, planned_minutes in enumerate(planned.tolist())
+    ]
+
+    for idx, s, e, d0, d1 in zip(
+        keep[:cut].tolist(),
+        starts[:cut].tolist(),
+        ends[:cut].tolist(),
+        first_day[:cut].tolist(),
+        last_day[:cut].tolist(),
+    ):
+        t = tasks[idx]
+        meta = task_meta.get(str(t["_id"]), {})
+        for d in range(d0, min(d1, n_days - 1) + 1):
+            day_start = d * daily_minutes
+            seg_start = max(s, day_start)
+            seg_end = min(e, day_start + daily_minutes)
+            days[d]["items"].append(_schedule_item(t, meta, seg_end - seg_start, seg_end < e))
+
+    return days
+
+
 @dataclass
 class GenerateScheduleInput:
     user_id: str
@@ -28,24 +169,15 @@ class GenerateScheduleInput:
     daily_study_minutes: int
 
 
-def generate_and_store_schedule(inp: GenerateScheduleInput):
-    """
-    Rule-based scheduler (Phase 5):
-    - Take user's pending tasks
-    - Sort by deadline asc, then difficulty desc (high > medium > low)
-    - Distribute work into dailyStudyMinutes starting at startDate
-    - Tasks can be split across days if they don't fit in one day
-    """
-    if inp.daily_study_minutes <= 0:
-        raise ValueError("dailyStudyMinutes must be > 0")
+def schedulable_tasks_query(user_id: str) -> dict:
+    # Include pending + missed (anything not done is still schedulable)
+    return {"userId": user_id, "status": {"$ne": "done"}}
 
-    start = _parse_yyyy_mm_dd(inp.start_date)
-    db = get_db()
 
-    # Include pending + missed (anything not done is still schedulable)
-    tasks = list(
+def _load_schedulable_tasks(db, user_id: str) -> list:
+    return list(
         db.tasks.find(
-            {"userId": inp.user_id, "status": {"$ne": "done"}},
+            schedulable_tasks_query(user_id),
             {
                 "_id": 1,
                 "subjectId": 1,
@@ -59,6 +191,8 @@ def generate_and_store_schedule(inp: GenerateScheduleInput):
         )
     )
 
+
+def _sort_tasks(tasks: list, start: date) -> list:
     def sort_key(t):
         # deadline first (string YYYY-MM-DD sorts lexicographically)
         deadline = t.get("deadline") or "9999-12-31"
@@ -78,86 +212,67 @@ def generate_and_store_schedule(inp: GenerateScheduleInput):
         # then apply adaptive tiebreakers:
         # - near deadline first
         # - missedCount higher first
-        return (deadline, -diff_rank, -near_deadline_boost, -missed_count)
+        # - task id (creation order), so ties don't depend on Mongo's natural
+        #   order and a stored plan can be re-sorted to the same result
+        return (deadline, -diff_rank, -near_deadline_boost, -missed_count, str(t["_id"]))
+
+    return sorted(tasks, key=sort_key)
 
-    tasks.sort(key=sort_key)
 
-    # Remaining minutes per taskId — use ML prediction when we have enough history
-    task_meta = {}  # task_id -> { minutes, minutesSource, mlExplain }
-    for t in tasks:
+def _task_minutes(tasks: list, user_id: str, model: DurationModel | None = None) -> dict:
+    """
+    Remaining minutes per taskId — use ML prediction when we have enough history
+    (history is loaded and the model fitted once for the whole batch).
+    Returns task_id -> { minutes, minutesSource, mlExplain }.
+    """
+    task_meta = {}
+    for t, (pred, explain) in zip(tasks, predict_minutes_batch(tasks, user_id, model)):
         tid = str(t["_id"])
-        pred, explain = get_predicted_minutes(t, inp.user_id)
         est = int(t.get("estimatedMinutes") or 0)
         if pred is not None and explain:
             task_meta[tid] = {"minutes": pred, "minutesSource": "ml_prediction", "mlExplain": explain}
         else:
             task_meta[tid] = {"minutes": max(1, est), "minutesSource": "estimated", "mlExplain": None}
+    return task_meta
 
-    remaining = {tid: m["minutes"] for tid, m in task_meta.items()}
 
+def _max_missed(tasks: list) -> int:
+    return max([int(t.get("missedCount") or 0) for t in tasks], default=0)
+
+
+def _effective_daily_minutes(daily_minutes: int, max_missed: int) -> int:
     # Adaptive rule: if any task is missed twice+, reduce daily workload a bit
-    max_missed = max([int(t.get("missedCount") or 0) for t in tasks], default=0)
-    effective_daily_minutes = inp.daily_study_minutes
     if max_missed >= 2:
         # reduce by 20%, but keep a sensible minimum so user still progresses
-        effective_daily_minutes = max(30, int(inp.daily_study_minutes * 0.8))
-
-    days = []
-    day_index = 0
-
-    # If no tasks, still store an empty schedule
-    while True:
-        if all(m <= 0 for m in remaining.values()):
-            break
+        return max(30, int(daily_minutes * 0.8))
+    return daily_minutes
 
-        current_date = start + timedelta(days=day_index)
-        day_index += 1
-
-        capacity = effective_daily_minutes
-        items = []
-
-        for t in tasks:
-            if capacity <= 0:
-                break
-
-            task_id = str(t["_id"])
-            rem = remaining.get(task_id, 0)
-            if rem <= 0:
-                continue
 
-            allocate = min(rem, capacity)
-            remaining[task_id] = rem - allocate
-            capacity -= allocate
+@SCHEDULE_GENERATION.time()
+def generate_and_store_schedule(inp: GenerateScheduleInput):
+    """
+    Rule-based scheduler (Phase 5):
+    - Take user's pending tasks
+    - Sort by deadline asc, then difficulty desc (high > medium > low)
+    - Distribute work into dailyStudyMinutes starting at startDate
+    - Tasks can be split across days if they don't fit in one day
+    """
+    if inp.daily_study_minutes <= 0:
+        raise ValueError("dailyStudyMinutes must be > 0")
 
-            meta = task_meta.get(task_id, {})
-            items.append(
-                {
-                    "taskId": task_id,
-                    "subjectId": t.get("subjectId", ""),
-                    "topic": t.get("topic", ""),
-                    "difficulty": (t.get("difficulty") or "medium").lower(),
-                    "deadline": t.get("deadline") or "",
-                    "minutes": allocate,
-                    "isPartial": allocate < rem,
-                    "sourceStatus": t.get("status", "pending"),
-                    "missedCount": int(t.get("missedCount") or 0),
-                    "minutesSource": meta.get("minutesSource", "estimated"),
-                    "mlExplain": meta.get("mlExplain"),
-                }
-            )
+    start = _parse_yyyy_mm_dd(inp.start_date)
+    db = get_db()
 
-        planned_minutes = effective_daily_minutes - capacity
-        days.append(
-            {
-                "date": _to_yyyy_mm_dd(current_date),
-                "plannedMinutes": planned_minutes,
-                "items": items,
-            }
-        )
+    # Task edits stamped after this are not in the plan (see `repair_schedule`)
+    tasks_loaded_at = datetime.now(timezone.utc)
+    tasks = _sort_tasks(_load_schedulable_tasks(db, inp.user_id), start)
+    model = get_duration_model(inp.user_id)
+    task_meta = _task_minutes(tasks, inp.user_id, model)
+    max_missed = _max_missed(tasks)
+    effective_daily_minutes = _effective_daily_minutes(inp.daily_study_minutes, max_missed)
 
-        # safety to avoid infinite loops if estimatedMinutes were 0
-        if day_index > 365:
-            break
+    days = allocate_days(tasks, task_meta, start, effective_daily_minutes)
+    feasibility = feasibility_report(tasks, task_meta, start, effective_daily_minutes, max_missed)
 
     now = datetime.now(timezone.utc)
     schedule_doc = {
@@ -166,6 +281,9 @@ def generate_and_store_schedule(inp: GenerateScheduleInput):
         "dailyStudyMinutes": inp.daily_study_minutes,
         "effectiveDailyStudyMinutes": effective_daily_minutes,
         "days": days,
+        "feasibility": feasibility,
+        "tasksLoadedAt": tasks_loaded_at,
+        "mlHistoryVersion": model.version,
         "createdAt": now,
         "updatedAt": now,
     }
@@ -179,12 +297,394 @@ def generate_and_store_schedule(inp: GenerateScheduleInput):
         "dailyStudyMinutes": inp.daily_study_minutes,
         "effectiveDailyStudyMinutes": effective_daily_minutes,
         "days": days,
+        "feasibility": feasibility,
+    }
+
+
+MAX_SIMULATION_SCENARIOS = 50
+
+
+@dataclass
+class SimulateScheduleInput:
+    user_id: str
+    daily_budgets: list[int]
+    start_dates: list[str]  # YYYY-MM-DD
+
+
+# Deadline offset used for tasks without a (valid) deadline: never late
+NO_DEADLINE_OFFSET = 10**12
+MAX_LATE_TASKS_REPORTED = 50
+
+
+def _plan_arrays(tasks: list, task_meta: dict, start: date):
+    """
+    Sorted tasks as arrays: indexes of tasks with work left, their cumulative
+    end minute on the plan line, and deadline offsets (days from start).
+    """
+    import numpy as np
+
+    minutes = np.array([task_meta.get(str(t["_id"]), {}).get("minutes", 0) for t in tasks], dtype=np.int64)
+    keep = np.flatnonzero(minutes > 0)
+    offsets_by_deadline = {}
+    deadline_offsets = np.empty(keep.size, dtype=np.int64)
+    for i, idx in enumerate(keep.tolist()):
+        deadline = tasks[idx].get("deadline") or ""
+        offset = offsets_by_deadline.get(deadline)
+        if offset is None:
+            try:
+                offset = (_parse_yyyy_mm_dd(deadline) - start).days
+            except ValueError:
+                offset = NO_DEADLINE_OFFSET
+            offsets_by_deadline[deadline] = offset
+        deadline_offsets[i] = offset
+    return keep, np.cumsum(minutes[keep]), deadline_offsets
+
+
+def feasibility_report(tasks: list, task_meta: dict, start: date, daily_minutes: int, max_missed: int = 0) -> dict:
+    """
+    Deadline check for a plan (tasks in schedule order, which is earliest
+    deadline first): which tasks finish late and by how much at
+    `daily_minutes` (effective), and the smallest daily budget that meets
+    every deadline still in the future (None, with deadlinesReachable false,
+    when even studying all MINUTES_PER_DAY wouldn't).
+
+    A task finishes on day (cum_end - 1) // capacity, so it is on time iff
+    cum_end <= capacity * (deadline_offset + 1); the required capacity is the
+    max of ceil(cum_end / (deadline_offset + 1)) over the prefix sums. The
+    smallest budget reaching it through the missed-task reduction is found by
+    binary search. Tasks already past their deadline at `start` can't be
+    fixed by any budget and are left out of that requirement.
+    """
+    import numpy as np
+
+    keep, ends, deadline_offsets = _plan_arrays(tasks, task_meta, start)
+    last_day = (ends - 1) // daily_minutes
+    planned_task = last_day < MAX_SCHEDULE_DAYS
+    days_late = np.where(planned_task, np.maximum(0, last_day - deadline_offsets), 0)
+    late = np.flatnonzero(days_late > 0)
+
+    upcoming = (deadline_offsets >= 0) & (deadline_offsets < NO_DEADLINE_OFFSET)
+    required = 0
+    if upcoming.any():
+        required = int((-(-ends[upcoming] // (deadline_offsets[upcoming] + 1))).max())
+
+    # Smallest budget whose effective daily minutes reach `required` (monotone)
+    min_budget = None
+    if _effective_daily_minutes(MINUTES_PER_DAY, max_missed) >= required:
+        lo, hi = 1, MINUTES_PER_DAY
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _effective_daily_minutes(mid, max_missed) >= required:
+                hi = mid
+            else:
+                lo = mid + 1
+        min_budget = lo
+
+    late_tasks = []
+    for i in late[:MAX_LATE_TASKS_REPORTED].tolist():
+        t = tasks[int(keep[i])]
+        late_tasks.append({
+            "taskId": str(t["_id"]),
+            "topic": t.get("topic", ""),
+            "deadline": t.get("deadline") or "",
+            "finishDate": _to_yyyy_mm_dd(start + timedelta(days=int(last_day[i]))),
+            "daysLate": int(days_late[i]),
+        })
+
+    unscheduled = int(keep.size - planned_task.sum())
+    return {
+        "feasible": late.size == 0 and unscheduled == 0,
+        "lateTaskCount": int(late.size),
+        "daysOverDeadline": int(days_late.sum()),
+        "maxDaysLate": int(days_late.max()) if days_late.size else 0,
+        "overdueTaskCount": int((deadline_offsets < 0).sum()),
+        "unscheduledTasks": unscheduled,
+        "deadlinesReachable": min_budget is not None,
+        "requiredDailyMinutes": required if min_budget is not None else None,
+        "minDailyStudyMinutes": min_budget,
+        "lateTasks": late_tasks,
+    }
+
+
+def _evaluate_budgets(tasks: list, task_meta: dict, start: date, budgets: list[int]) -> list[dict]:
+    """
+    Outcome of `allocate_days` for every budget at once, without building
+    the days: with the sorted minutes laid end to end, a task finishes on day
+    (cum_end - 1) // capacity, so one (budgets x tasks) integer division
+    gives every finish day.
+    """
+    import numpy as np
+
+    _, ends, deadline_offsets = _plan_arrays(tasks, task_meta, start)
+    total = int(ends[-1]) if ends.size else 0
+
+    capacity = np.array(budgets, dtype=np.int64)[:, None]
+    last_day = (ends[None, :] - 1) // capacity
+    # Tasks that don't finish within the safety cap are left (partly) unplanned
+    planned_task = last_day < MAX_SCHEDULE_DAYS
+    days_late = np.where(planned_task, np.maximum(0, last_day - deadline_offsets), 0)
+
+    results = []
+    for s, budget in enumerate(budgets):
+        if not ends.size:
+            results.append({
+                "finishDate": None, "daysUsed": 0, "totalMinutes": 0, "plannedMinutes": 0,
+                "lateTasks": 0, "daysOverDeadline": 0, "maxDaysLate": 0, "unscheduledTasks": 0,
+                "load": {"avgMinutesPerDay": 0, "peakMinutesPerDay": 0, "lastDayMinutes": 0},
+            })
+            continue
+        finish_day = int(last_day[s, -1])
+        days_used = min(finish_day + 1, MAX_SCHEDULE_DAYS)
+        planned_minutes = min(total, days_used * budget)
+        unscheduled = int(ends.size - planned_task[s].sum())
+        results.append({
+            "finishDate": _to_yyyy_mm_dd(start + timedelta(days=finish_day)) if not unscheduled else None,
+            "daysUsed": days_used,
+            "totalMinutes": total,
+            "plannedMinutes": planned_minutes,
+            "lateTasks": int((days_late[s] > 0).sum()),
+            "daysOverDeadline": int(days_late[s].sum()),
+            "maxDaysLate": int(days_late[s].max()),
+            "unscheduledTasks": unscheduled,
+            "load": {
+                "avgMinutesPerDay": round(planned_minutes / days_used, 1),
+                "peakMinutesPerDay": min(budget, total),
+                "lastDayMinutes": planned_minutes - (days_used - 1) * budget,
+            },
+        })
+    return results
+
+
+def simulate_schedules(inp: SimulateScheduleInput) -> list[dict]:
+    """
+    What-if evaluation of several daily budgets / start dates. Nothing is
+    stored: one task load and one ML prediction pass serve every scenario,
+    and each start date is evaluated for all budgets in one vectorized pass.
+    Budgets go through the same missed-task reduction as real schedules.
+    """
+    if not inp.daily_budgets or any(b <= 0 for b in inp.daily_budgets):
+        raise ValueError("dailyStudyMinutes must be > 0")
+    starts = [_parse_yyyy_mm_dd(s) for s in inp.start_dates]
+
+    tasks = _load_schedulable_tasks(get_db(), inp.user_id)
+    task_meta = _task_minutes(tasks, inp.user_id)
+    max_missed = _max_missed(tasks)
+    effective = [_effective_daily_minutes(b, max_missed) for b in inp.daily_budgets]
+
+    scenarios = []
+    for start_str, start in zip(inp.start_dates, starts):
+        ordered = _sort_tasks(tasks, start)
+        for budget, eff, result in zip(inp.daily_budgets, effective, _evaluate_budgets(ordered, task_meta, start, effective)):
+            scenarios.append({
+                "startDate": start_str,
+                "dailyStudyMinutes": budget,
+                "effectiveDailyStudyMinutes": eff,
+                **result,
+            })
+    return scenarios
+
+
+def _plan_from_days(days: list) -> tuple[list, dict]:
+    """
+    Tasks (in plan order) and per-task minutes recovered from a stored plan:
+    the items carry every field `_schedule_item` needs.
+    """
+    tasks, task_meta = [], {}
+    for day in days:
+        for item in day.get("items") or []:
+            tid = item["taskId"]
+            meta = task_meta.get(tid)
+            if meta is None:
+                tasks.append({
+                    "_id": tid,
+                    "subjectId": item.get("subjectId", ""),
+                    "topic": item.get("topic", ""),
+                    "difficulty": item.get("difficulty", "medium"),
+                    "deadline": item.get("deadline", ""),
+                    "estimatedMinutes": item.get("estimatedMinutes"),
+                    "status": item.get("sourceStatus", "pending"),
+                    "missedCount": int(item.get("missedCount") or 0),
+                })
+                meta = task_meta[tid] = {
+                    "minutes": 0,
+                    "minutesSource": item.get("minutesSource", "estimated"),
+                    "mlExplain": item.get("mlExplain"),
+                }
+            meta["minutes"] += int(item.get("minutes") or 0)
+    return tasks, task_meta
+
+
+def _planned_fields(t: dict) -> tuple:
+    # What a plan item records about its task, besides the status an event changes
+    return (
+        t.get("subjectId", ""),
+        t.get("topic", ""),
+        (t.get("difficulty") or "medium").lower(),
+        t.get("deadline") or "",
+        t.get("estimatedMinutes"),
+    )
+
+
+def repair_plan(
+    days: list, start: date, daily_minutes: int, effective_daily_minutes: int, task_id: str, outcome: str
+) -> tuple[list, dict, list] | None:
+    """
+    Apply one task outcome to a complete stored plan without reloading tasks
+    or re-predicting minutes: drop the task (done) or bump its missedCount
+    and re-sort (missed), then re-flow only the days from the first changed
+    position on. Returns (tasks, task_meta, days), or None when the change
+    alters the effective daily budget or the task isn't in the plan (caller
+    regenerates from scratch). Matches `allocate_days` on the updated task
+    list exactly.
+    """
+    import numpy as np
+
+    old_tasks, task_meta = _plan_from_days(days)
+    old_index = next((i for i, t in enumerate(old_tasks) if t["_id"] == task_id), None)
+    if old_index is None:
+        return None
+
+    if outcome == "done":
+        tasks = old_tasks[:old_index] + old_tasks[old_index + 1:]
+        task_meta = {tid: m for tid, m in task_meta.items() if tid != task_id}
+        first_changed = old_index
+    else:
+        bumped = {**old_tasks[old_index], "status": "missed", "missedCount": old_tasks[old_index]["missedCount"] + 1}
+        tasks = _sort_tasks(old_tasks[:old_index] + [bumped] + old_tasks[old_index + 1:], start)
+        first_changed = min(old_index, next(i for i, t in enumerate(tasks) if t["_id"] == task_id))
+
+    if _effective_daily_minutes(daily_minutes, _max_missed(tasks)) != effective_daily_minutes:
+        return None
+    if not tasks:
+        return tasks, task_meta, []
+
+    # Days before the one holding the first changed position are untouched
+    budget = effective_daily_minutes
+    ends = np.cumsum([task_meta[t["_id"]]["minutes"] for t in tasks])
+    line_start = int(ends[first_changed - 1]) if first_changed > 0 else 0
+    d0 = line_start // budget
+    # First task still running at the start of day d0 (may be mid-task)
+    q = int(np.searchsorted(ends, d0 * budget, side="right"))
+
+    tail_tasks = tasks[q:]
+    tail_meta = {t["_id"]: task_meta[t["_id"]] for t in tail_tasks}
+    if tail_tasks:
+        head = tail_tasks[0]["_id"]
+        tail_meta[head] = {**tail_meta[head], "minutes": int(ends[q]) - d0 * budget}
+    tail_days = allocate_days(
+        tail_tasks, tail_meta, start + timedelta(days=d0), budget, max_days=MAX_SCHEDULE_DAYS - d0
+    )
+    return tasks, task_meta, days[:d0] + tail_days
+
+
+def repair_schedule(inp: GenerateScheduleInput, event: dict) -> dict | None:
+    """
+    Incremental alternative to `generate_and_store_schedule` after a single
+    task event. Uses the latest stored plan when it is for the same start
+    date and budget, covers every pending task, and no other task was added,
+    edited or removed since its tasks were loaded. The event's own write
+    hides edits to its task, so a task staying in the plan (missed) must
+    still match its plan item. The plan keeps its stored per-task minutes, so
+    it must also have been built at the current ML history version unless
+    predictions apply neither then nor now (every done event bumps the
+    version, so with ML active a done event always regenerates).
+    Returns None whenever a full regeneration is needed.
+    """
+    db = get_db()
+    latest = db.schedules.find_one({"userId": inp.user_id}, sort=LATEST_SCHEDULE_SORT)
+    if (
+        not latest
+        or latest.get("startDate") != inp.start_date
+        or latest.get("dailyStudyMinutes") != inp.daily_study_minutes
+        or (latest.get("feasibility") or {}).get("unscheduledTasks", 1) != 0
+    ):
+        return None
+
+    model = get_duration_model(inp.user_id)
+    if latest.get("mlHistoryVersion") != model.version:
+        items = (item for day in latest.get("days") or [] for item in day.get("items") or [])
+        if model.coef is not None or any(item.get("minutesSource") == "ml_prediction" for item in items):
+            return None
+
+    task_id = event.get("taskId") or ""
+    try:
+        task_oid = ObjectId(task_id)
+    except Exception:
+        return None
+    start = _parse_yyyy_mm_dd(inp.start_date)
+    effective_daily_minutes = int(latest.get("effectiveDailyStudyMinutes") or inp.daily_study_minutes)
+    repaired = repair_plan(
+        latest.get("days") or [], start, inp.daily_study_minutes, effective_daily_minutes, task_id, event.get("outcome")
+    )
+    if repaired is None:
+        return None
+    tasks, task_meta, days = repaired
+
+    # Task set check in one roundtrip: pending count must match the repaired
+    # plan, nothing but the event's task may have changed since the plan, and
+    # the event's task as it is now. Edits stamped in the millisecond of the
+    # load (stored precision) count as changes; plans from before
+    # tasksLoadedAt was stored compare against their creation time.
+    tasks_loaded_at = datetime.now(timezone.utc)
+    pipeline = [
+        {"$match": {"userId": inp.user_id}},
+        {
+            "$facet": {
+                "pending": [{"$match": {"status": {"$ne": "done"}}}, {"$count": "n"}],
+                "changed": [
+                    {"$match": {
+                        "updatedAt": {"$gte": latest.get("tasksLoadedAt") or latest["createdAt"]},
+                        "_id": {"$ne": task_oid},
+                    }},
+                    {"$limit": 1},
+                    {"$count": "n"},
+                ],
+                "eventTask": [
+                    {"$match": {"_id": task_oid}},
+                    {"$project": {"_id": 0, "subjectId": 1, "topic": 1, "difficulty": 1, "deadline": 1, "estimatedMinutes": 1}},
+                ],
+            }
+        },
+    ]
+    res = next(db.tasks.aggregate(pipeline), {})
+    pending = (res.get("pending") or [{}])[0].get("n", 0)
+    changed = (res.get("changed") or [{}])[0].get("n", 0)
+    if pending != len(tasks) or changed:
+        return None
+    planned = next((t for t in tasks if t["_id"] == task_id), None)
+    if planned is not None:
+        current = (res.get("eventTask") or [None])[0]
+        if current is None or _planned_fields(current) != _planned_fields(planned):
+            return None
+
+    feasibility = feasibility_report(tasks, task_meta, start, effective_daily_minutes, _max_missed(tasks))
+    now = datetime.now(timezone.utc)
+    result = db.schedules.insert_one({
+        "userId": inp.user_id,
+        "startDate": inp.start_date,
+        "dailyStudyMinutes": inp.daily_study_minutes,
+        "effectiveDailyStudyMinutes": effective_daily_minutes,
+        "days": days,
+        "feasibility": feasibility,
+        "repairedFrom": latest["_id"],
+        "tasksLoadedAt": tasks_loaded_at,
+        "mlHistoryVersion": model.version,
+        "createdAt": now,
+        "updatedAt": now,
+    })
+    return {
+        "id": str(result.inserted_id),
+        "startDate": inp.start_date,
+        "dailyStudyMinutes": inp.daily_study_minutes,
+        "effectiveDailyStudyMinutes": effective_daily_minutes,
+        "days": days,
+        "feasibility": feasibility,
     }
 
 
 def get_latest_schedule(user_id: str):
     db = get_db()
-    doc = db.schedules.find_one({"userId": user_id}, sort=[("createdAt", -1)])
+    doc = db.schedules.find_one({"userId": user_id}, sort=LATEST_SCHEDULE_SORT)
     if not doc:
         return None
     return {
@@ -192,6 +692,7 @@ def get_latest_schedule(user_id: str):
         "startDate": doc.get("startDate", ""),
         "dailyStudyMinutes": doc.get("dailyStudyMinutes", 0),
         "days": doc.get("days", []),
+        "feasibility": doc.get("feasibility"),
         "createdAt": doc.get("createdAt"),
     }
 
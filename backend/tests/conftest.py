@@ -0,0 +1,128 @@
+"""
+Shared fixtures. `db` patches an in-memory mongomock database in as
+`get_db()` and resets the per-process caches around each test; `client`,
+`auth_headers` and `make_task` drive the schedule API on it as USER_ID.
+`live_db`
+does the same with a throwaway, migrated database on a real mongod
+(TEST_MONGO_URI) for tests that need server behaviour mongomock lacks
+(explain plans, command monitoring, `$lookup` pipelines); those tests are
+skipped when no server answers.
+
+Run from backend/:
+    pip install -r requirements-dev.txt
+    python -m pytest
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import mongomock
+import pytest
+from flask import Flask
+from pymongo import InsertOne, MongoClient, UpdateOne
+from pymongo.errors import PyMongoError
+
+from src.db import mongo
+from src.db.migrate import migrate
+from src.db.monitoring import LISTENERS
+from src.routes.schedule_routes import schedule_bp
+from src.services import auth_middleware, ml_service
+from src.services.jwt_service import create_access_token
+
+TEST_MONGO_URI = os.getenv("TEST_MONGO_URI", "mongodb://localhost:27017")
+USER_ID = "u1"
+
+
+def _bulk_write(self, requests, ordered=True, **kwargs):
+    # mongomock's bulk_write doesn't accept pymongo 4.x operation objects;
+    # replay the two kinds the services issue one by one
+    for op in requests:
+        if isinstance(op, UpdateOne):
+            self.update_one(op._filter, op._doc, upsert=op._upsert)
+        elif isinstance(op, InsertOne):
+            self.insert_one(op._doc)
+        else:
+            raise NotImplementedError(type(op).__name__)
+
+
+def _reset_caches():
+    with ml_service._model_cache_lock:
+        ml_service._model_cache.clear()
+    with auth_middleware._identity_cache_lock:
+        auth_middleware._identity_cache.clear()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", _bulk_write)
+    database = mongomock.MongoClient()["smart_study_scheduler"]
+    monkeypatch.setattr(mongo, "_db", database)
+    _reset_caches()
+    yield database
+    _reset_caches()
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    # Tokens carry name and email: auth needs no users document
+    monkeypatch.setattr(auth_middleware, "AUTH_TRUST_TOKEN_CLAIMS", True)
+    app = Flask(__name__)
+    app.register_blueprint(schedule_bp, url_prefix="/api/schedule")
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers() -> dict:
+    token = create_access_token(USER_ID, name="Test", email="test@example.com")
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def make_task(db):
+    """Insert a pending task for USER_ID (fields overridable); returns its id."""
+
+    def make(**overrides) -> str:
+        now = datetime.now(timezone.utc)
+        doc = {
+            "userId": USER_ID,
+            "subjectId": "math",
+            "topic": "Limits",
+            "difficulty": "medium",
+            "estimatedMinutes": 60,
+            "deadline": (date.today() + timedelta(days=7)).isoformat(),
+            "status": "pending",
+            "missedCount": 0,
+            "createdAt": now,
+            "updatedAt": now,
+            **overrides,
+        }
+        return str(db.tasks.insert_one(doc).inserted_id)
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def live_client():
+    client = MongoClient(TEST_MONGO_URI, serverSelectionTimeoutMS=500, event_listeners=LISTENERS)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        client.close()
+        pytest.skip(f"no mongod reachable at {TEST_MONGO_URI}")
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def live_db(live_client, monkeypatch):
+    name = f"smart_study_scheduler_test_{uuid.uuid4().hex[:8]}"
+    database = live_client[name]
+    monkeypatch.setattr(mongo, "_db", database)
+    _reset_caches()
+    migrate(database)
+    yield database
+    live_client.drop_database(name)
+    _reset_caches()
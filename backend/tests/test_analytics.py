@@ -0,0 +1,125 @@
+import random
+import re
+from datetime import date, datetime, timedelta, timezone
+
+from flask import Flask
+
+from src.routes.analytics_routes import analytics_bp
+from src.services import analytics_service, auth_middleware
+from src.services.analytics_service import STREAK, _streak_days, rebuild_streak, record_event_rollup
+from src.services.jwt_service import create_access_token
+from src.services.request_instrumentation import init_request_instrumentation
+
+
+def _app() -> Flask:
+    app = Flask(__name__)
+    app.testing = True
+    app.config["QUERY_BUDGET_STRICT"] = True  # over budget raises QueryBudgetExceeded
+    init_request_instrumentation(app)
+    app.register_blueprint(analytics_bp, url_prefix="/api/analytics")
+    return app
+
+
+def _commands(response) -> int:
+    return int(re.search(r'desc="(\d+) queries"', response.headers["Server-Timing"]).group(1))
+
+
+def test_summary_stays_within_query_budget(live_db, monkeypatch):
+    # No identity cache: every request pays the users lookup
+    monkeypatch.setattr(auth_middleware, "AUTH_CACHE_TTL_SECONDS", 0)
+    monkeypatch.setattr(auth_middleware, "AUTH_TRUST_TOKEN_CLAIMS", False)
+
+    user_id = str(live_db.users.insert_one({"name": "Ada", "email": "ada@example.com"}).inserted_id)
+    subject_ids = [str(live_db.subjects.insert_one({"userId": user_id, "name": f"S{i}"}).inserted_id) for i in range(12)]
+    now = datetime.now(timezone.utc)
+    today = date.today().isoformat()
+    live_db.tasks.insert_many([
+        {"userId": user_id, "subjectId": subject_ids[i % 12], "status": "done" if i % 3 else "pending", "createdAt": now}
+        for i in range(30)
+    ])
+    for i, subject_id in enumerate(subject_ids):
+        record_event_rollup(user_id, {"outcome": "done", "minutes": 10 + i, "subjectId": subject_id, "scheduledDate": today})
+
+    client = _app().test_client()
+    res = client.get("/api/analytics/summary", headers={"Authorization": f"Bearer {create_access_token(user_id)}"})
+
+    assert res.status_code == 200
+    assert _commands(res) <= 3
+    summary = res.get_json()["summary"]
+    assert summary["tasks"] == {"total": 30, "done": 20, "pending": 10}
+    assert summary["streakDays"] == 1
+    assert len(summary["charts"]["subjectMinutesTop"]) == 10
+    assert summary["charts"]["subjectMinutesTop"][0] == {"subjectId": subject_ids[-1], "subjectName": "S11", "minutes": 21}
+
+
+
+DAY = date(2026, 10, 18)
+
+
+def _log(user_id: str, day: date):
+    record_event_rollup(user_id, {"outcome": "done", "minutes": 30, "subjectId": "math", "scheduledDate": day.isoformat()})
+
+
+def _streak_doc(db, user_id: str) -> dict:
+    return db.daily_rollups.find_one({"userId": user_id, "date": STREAK, "subjectId": ""})
+
+
+def test_sessions_logged_ahead_count_once_their_day_arrives(db):
+    # Today's and tomorrow's plan items are both marked done today
+    _log("u1", DAY)
+    _log("u1", DAY + timedelta(days=1))
+    doc = _streak_doc(db, "u1")
+
+    assert _streak_days(doc, DAY) == (1, 1)
+    assert _streak_days(doc, DAY + timedelta(days=1)) == (2, 2)
+    assert _streak_days(doc, DAY + timedelta(days=2)) == (0, 2)
+
+
+def test_future_run_does_not_hide_todays_run(db):
+    for offset in (-1, 0, 3):
+        _log("u1", DAY + timedelta(days=offset))
+    doc = _streak_doc(db, "u1")
+
+    assert _streak_days(doc, DAY) == (2, 2)
+    assert _streak_days(doc, DAY + timedelta(days=1)) == (0, 2)
+    assert _streak_days(doc, DAY + timedelta(days=3)) == (1, 2)
+
+
+def _expected(days: set, today: date) -> tuple[int, int]:
+    current = 0
+    while today - timedelta(days=current) in days:
+        current += 1
+    longest = run = 0
+    for d in sorted(d for d in days if d <= today):
+        run = run + 1 if d - timedelta(days=1) in days else 1
+        longest = max(longest, run)
+    return current, longest
+
+
+def test_incremental_streak_matches_rebuild(db):
+    rng = random.Random(1)
+    for trial in range(20):
+        user_id = f"u{trial}"
+        days = [DAY + timedelta(days=rng.randint(-40, 10)) for _ in range(rng.randint(1, 60))]
+        for d in days:
+            _log(user_id, d)
+
+        incremental = _streak_doc(db, user_id)
+        rebuilt = rebuild_streak(user_id)
+        assert incremental["runs"] == rebuilt["runs"]
+        for offset in range(-45, 15):
+            today = DAY + timedelta(days=offset)
+            assert _streak_days(incremental, today) == _expected(set(days), today)
+
+
+def test_dropped_runs_keep_their_length(db, monkeypatch):
+    monkeypatch.setattr(analytics_service, "STREAK_RUNS_KEPT", 2)
+    # Runs of 4, 1 and 2 days; the 4-day run is dropped from the document
+    days = [DAY + timedelta(days=o) for o in (0, 1, 2, 3, 5, 8, 9)]
+    for d in days:
+        _log("u1", d)
+    doc = _streak_doc(db, "u1")
+
+    assert len(doc["runs"]) == 2
+    assert _streak_days(doc, DAY + timedelta(days=9)) == (2, 4)
+    assert rebuild_streak("u1")["runs"] == doc["runs"]
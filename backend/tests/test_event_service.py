@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+
+from src.db.migrate import SCHEMA_VERSION, migrate
+from src.services.analytics_service import ALL_TIME, STREAK
+from src.services.event_service import parse_event
+
+TASK_ID = str(ObjectId())
+
+
+@pytest.mark.parametrize("value", [ALL_TIME, STREAK, "2026-13-01", "tomorrow", 20261018])
+def test_parse_event_rejects_non_dates(value):
+    with pytest.raises(ValueError, match="scheduledDate"):
+        parse_event("u1", {"taskId": TASK_ID, "outcome": "done", "scheduledDate": value})
+
+
+@pytest.mark.parametrize("field, value, message", [
+    ("taskId", 123, "taskId is required"),
+    ("taskId", ["x"], "taskId is required"),
+    ("outcome", 1, "outcome must be done or missed"),
+    ("outcome", {"done": True}, "outcome must be done or missed"),
+])
+def test_parse_event_rejects_non_string_fields(field, value, message):
+    with pytest.raises(ValueError, match=message):
+        parse_event("u1", {"taskId": TASK_ID, "outcome": "done", field: value})
+
+
+def test_batch_reports_non_string_fields_by_index(db, client, auth_headers):
+    events = [{"taskId": TASK_ID, "outcome": "done"}, {"taskId": 123, "outcome": "done"}, {"taskId": TASK_ID, "outcome": 1}]
+    res = client.post("/api/schedule/events/batch", json={"events": events}, headers=auth_headers)
+    assert res.status_code == 400
+    assert res.get_json()["errors"] == [
+        {"index": 1, "message": "taskId is required"},
+        {"index": 2, "message": "outcome must be done or missed"},
+    ]
+    assert db.task_events.count_documents({}) == 0
+
+
+def test_parse_event_normalises_dates():
+    ev = parse_event("u1", {"taskId": TASK_ID, "outcome": "done", "scheduledDate": " 20261018 "})
+    assert ev.scheduled_date == "2026-10-18"
+    assert parse_event("u1", {"taskId": TASK_ID, "outcome": "missed"}).scheduled_date == ""
+
+
+def test_migrate_backfills_rollups_once(db):
+    now = datetime.now(timezone.utc)
+    db.meta.insert_one({"_id": "schema", "version": 3})  # before daily_rollups
+    db.task_events.insert_many([
+        {"userId": "u1", "subjectId": "math", "outcome": "done", "minutes": 30, "scheduledDate": "2026-10-17", "createdAt": now},
+        {"userId": "u1", "subjectId": "math", "outcome": "done", "minutes": 20, "scheduledDate": "2026-10-18", "createdAt": now},
+        # Recorded before scheduledDate was validated
+        {"userId": "u1", "subjectId": "math", "outcome": "done", "minutes": 10, "scheduledDate": ALL_TIME, "createdAt": now},
+    ])
+
+    migrate(db)
+
+    all_time = db.daily_rollups.find_one({"userId": "u1", "date": ALL_TIME, "subjectId": "math"})
+    assert all_time["minutes"] == 60 and all_time["doneCount"] == 3
+    days = sorted(d["date"] for d in db.daily_rollups.find({"userId": "u1", "date": {"$nin": [ALL_TIME, STREAK]}}))
+    assert days == ["2026-10-17", "2026-10-18"]
+    assert db.meta.find_one({"_id": "schema"})["version"] == SCHEMA_VERSION
+
+    # Already at the current version: rollups are left alone
+    db.daily_rollups.delete_many({})
+    migrate(db)
+    assert db.daily_rollups.count_documents({}) == 0
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.routes import schedule_routes
+from src.services import idempotency_service
+
+from conftest import USER_ID
+
+
+@pytest.fixture
+def task_id(make_task):
+    return make_task(estimatedMinutes=45)
+
+
+@pytest.fixture
+def post(client, auth_headers):
+    def post(task_id: str, key: str = "k1"):
+        headers = {**auth_headers, "Idempotency-Key": key}
+        return client.post("/api/schedule/events", json={"taskId": task_id, "outcome": "done", "minutes": 30}, headers=headers)
+
+    return post
+
+
+def test_retry_after_failed_regeneration_does_not_record_again(db, post, task_id, monkeypatch):
+    regenerate = schedule_routes.regenerate_schedule
+    calls = []
+
+    def flaky_regenerate(inp, event=None):
+        calls.append(event)
+        if len(calls) == 1:
+            raise RuntimeError("generation failed")
+        return regenerate(inp, event=event)
+
+    monkeypatch.setattr(schedule_routes, "regenerate_schedule", flaky_regenerate)
+
+    assert post(task_id).status_code == 500
+    assert db.task_events.count_documents({"userId": USER_ID}) == 1
+
+    res = post(task_id)
+    assert res.status_code == 200 and res.get_json()["schedule"]
+    # Regenerated for the event recorded the first time, which isn't recorded twice
+    assert calls[1]["taskId"] == task_id
+    assert db.task_events.count_documents({"userId": USER_ID}) == 1
+    assert db.daily_rollups.find_one({"userId": USER_ID, "date": "all", "subjectId": "math"})["doneCount"] == 1
+
+    replay = post(task_id)
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert db.schedules.count_documents({"userId": USER_ID}) == 1
+
+
+def test_failure_before_recording_releases_the_key(db, post, monkeypatch):
+    assert post("000000000000000000000000").status_code == 404  # 4xx is final
+    assert db.idempotency_keys.find_one({"userId": USER_ID, "key": "k1"})["status"] == "done"
+
+    def broken(_ev):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(schedule_routes, "record_task_event", broken)
+    assert post("000000000000000000000000", key="k2").status_code == 500
+    assert db.idempotency_keys.find_one({"userId": USER_ID, "key": "k2"}) is None
+
+
+@pytest.mark.parametrize("lease_until, status_code", [
+    (timedelta(seconds=-1), 200),  # the worker holding it died
+    (timedelta(seconds=20), 409),  # still running
+    (None, 200),  # claimed before claims had a lease
+])
+def test_processing_claims_are_leased(db, client, post, task_id, lease_until, status_code):
+    now = datetime.now(timezone.utc)
+    claim = {"userId": USER_ID, "key": "k1", "status": "processing", "createdAt": now}
+    with client.application.test_request_context(
+        "/api/schedule/events", method="POST", json={"taskId": task_id, "outcome": "done", "minutes": 30}
+    ):
+        claim["fingerprint"] = idempotency_service._fingerprint()
+    if lease_until is not None:
+        claim["leaseUntil"] = now + lease_until
+    db.idempotency_keys.insert_one(claim)
+
+    res = post(task_id)
+    assert res.status_code == status_code
+    assert db.task_events.count_documents({"userId": USER_ID}) == (1 if status_code == 200 else 0)
@@ -0,0 +1,86 @@
+"""
+Index coverage: explain() every hot query the routes and services issue and
+fail on collection scans or in-memory sorts. The filters, sorts and
+pipelines come from the same helpers the code uses, so they can't drift.
+Needs a real mongod (see `live_db`); the database is migrated first, so this
+checks the INDEXES in src/db/migrate.py.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from src.routes.notifications_routes import NOTIFICATION_SORT
+from src.routes.subject_routes import SUBJECT_SORT
+from src.routes.task_routes import TASK_SORT, _decode_cursor, _encode_cursor, task_list_query
+from src.services.analytics_service import (
+    rollup_facets_pipeline,
+    streak_key,
+    study_days_query,
+    task_counts_pipeline,
+)
+from src.services.ml_service import done_events_query
+from src.services.scheduler_service import LATEST_SCHEDULE_SORT, schedulable_tasks_query
+
+BAD_STAGES = {"COLLSCAN", "SORT"}
+
+USER = "000000000000000000000000"
+TODAY = date.today()
+_CURSOR = _decode_cursor(
+    _encode_cursor({"_id": ObjectId(), "deadline": TODAY.isoformat(), "difficulty": "high", "createdAt": datetime.now(timezone.utc)})
+)
+
+# (name, collection, filter, sort) for find / find_one
+FIND_QUERIES = [
+    ("auth: user by id", "users", {"_id": ObjectId(USER)}, None),
+    ("auth: user by email", "users", {"email": "someone@example.com"}, None),
+    ("subjects: list", "subjects", {"userId": USER}, SUBJECT_SORT),
+    ("tasks: list", "tasks", task_list_query(USER), TASK_SORT),
+    ("tasks: list by status", "tasks", task_list_query(USER, status="pending"), TASK_SORT),
+    ("tasks: list by subject", "tasks", task_list_query(USER, subject_id=USER), TASK_SORT),
+    ("tasks: next page", "tasks", task_list_query(USER, after=_CURSOR), TASK_SORT),
+    ("tasks: next page by status", "tasks", task_list_query(USER, status="pending", after=_CURSOR), TASK_SORT),
+    ("scheduler: schedulable tasks", "tasks", schedulable_tasks_query(USER), None),
+    ("schedule: latest", "schedules", {"userId": USER}, LATEST_SCHEDULE_SORT),
+    ("notifications: list", "notifications", {"userId": USER}, NOTIFICATION_SORT),
+    ("ml: done events", "task_events", done_events_query(USER), None),
+    ("ml: done events since last fit", "task_events", done_events_query(USER, datetime.now(timezone.utc)), None),
+    ("ml: model state", "ml_models", {"userId": USER}, None),
+    ("analytics: streak document", "daily_rollups", streak_key(USER), None),
+    ("analytics: streak rebuild", "daily_rollups", study_days_query(USER), None),
+]
+
+# (name, collection, pipeline)
+AGGREGATE_QUERIES = [
+    ("analytics: task counts", "tasks", task_counts_pipeline(USER)),
+    ("analytics: rollup facets", "daily_rollups", rollup_facets_pipeline(USER, TODAY - timedelta(days=6), TODAY)),
+]
+
+
+def _plan_stages(node, found: set) -> set:
+    """Collect `stage` names from an explain document, skipping rejected plans."""
+    if isinstance(node, dict):
+        if isinstance(node.get("stage"), str):
+            found.add(node["stage"])
+        for key, value in node.items():
+            if key != "rejectedPlans":
+                _plan_stages(value, found)
+    elif isinstance(node, list):
+        for item in node:
+            _plan_stages(item, found)
+    return found
+
+
+@pytest.mark.parametrize("name, collection, query, sort", FIND_QUERIES, ids=[q[0] for q in FIND_QUERIES])
+def test_find_is_served_by_an_index(live_db, name, collection, query, sort):
+    cursor = live_db[collection].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    assert not _plan_stages(cursor.explain(), set()) & BAD_STAGES
+
+
+@pytest.mark.parametrize("name, collection, pipeline", AGGREGATE_QUERIES, ids=[q[0] for q in AGGREGATE_QUERIES])
+def test_aggregation_is_served_by_an_index(live_db, name, collection, pipeline):
+    explain = live_db.command("aggregate", collection, pipeline=pipeline, explain=True)
+    assert not _plan_stages(explain, set()) & BAD_STAGES
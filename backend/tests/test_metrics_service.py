@@ -0,0 +1,33 @@
+from flask import Blueprint, Flask
+from prometheus_client import REGISTRY
+
+from src.services.metrics_service import init_metrics
+
+
+def _count(endpoint: str) -> float:
+    labels = {"blueprint": "bench", "endpoint": endpoint, "method": "GET"}
+    return REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0.0
+
+
+def test_requests_are_observed_once_under_their_route():
+    bp = Blueprint("bench", __name__)
+
+    @bp.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    app = Flask(__name__)
+    init_metrics(app)
+    app.register_blueprint(bp)
+    client = app.test_client()
+
+    before = _count("bench.ping")
+    for _ in range(3):
+        assert client.get("/ping").status_code == 200
+    assert _count("bench.ping") == before + 3
+
+    # A 404 has no blueprint or endpoint
+    unmatched = {"blueprint": "app", "endpoint": "unmatched", "status": "404"}
+    before = REGISTRY.get_sample_value("http_request_errors_total", unmatched) or 0.0
+    client.get("/missing")
+    assert REGISTRY.get_sample_value("http_request_errors_total", unmatched) == before + 1
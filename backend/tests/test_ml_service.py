@@ -0,0 +1,151 @@
+import random
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from src.db.migrate import migrate
+from src.services.ml_service import (
+    DIFFICULTY_ENCODING,
+    DurationModel,
+    build_duration_stats,
+    get_duration_model,
+    get_predicted_minutes,
+    predict_minutes_batch,
+    record_done_event,
+)
+
+USER_ID = "u1"
+SUBJECTS = ["math", "physics", "history", ""]
+
+
+def _done_event(rng: random.Random) -> dict:
+    est = rng.randint(15, 180)
+    return {
+        "userId": USER_ID,
+        "outcome": "done",
+        "subjectId": rng.choice(SUBJECTS),
+        "difficulty": rng.choice(["low", "medium", "high", None]),
+        "estimatedMinutes": est,
+        "minutes": max(1, int(est * rng.uniform(0.6, 1.6))),
+        "createdAt": datetime.now(timezone.utc),
+    }
+
+
+def _tasks(rng: random.Random, n: int) -> list[dict]:
+    return [
+        {
+            "subjectId": rng.choice(SUBJECTS + ["unseen"]),
+            "difficulty": rng.choice(["low", "medium", "high", "HIGH", None]),
+            "estimatedMinutes": rng.choice([0, None, rng.randint(10, 240)]),
+        }
+        for _ in range(n)
+    ]
+
+
+def test_batch_predictions_match_per_task(db):
+    rng = random.Random(3)
+    db.task_events.insert_many([_done_event(rng) for _ in range(60)])
+    tasks = _tasks(rng, 50)
+
+    batch = predict_minutes_batch(tasks, USER_ID)
+
+    assert batch == [get_predicted_minutes(t, USER_ID) for t in tasks]
+    assert any(pred is not None for pred, _ in batch)
+    assert any(pred is None for pred, _ in batch)  # tasks without an estimate
+
+
+def test_batch_predictions_need_enough_history(db):
+    rng = random.Random(4)
+    db.task_events.insert_many([_done_event(rng) for _ in range(4)])
+    tasks = _tasks(rng, 5)
+
+    assert predict_minutes_batch(tasks, USER_ID) == [(None, None)] * 5
+    assert [get_predicted_minutes(t, USER_ID) for t in tasks] == [(None, None)] * 5
+
+
+def _sklearn_fit(events: list) -> LinearRegression:
+    """The original per-request fit: X = [estimate, difficulty, subject average]."""
+    minutes_by_subject = {}
+    for e in events:
+        minutes_by_subject.setdefault(e.get("subjectId") or "", []).append(int(e.get("minutes") or 0))
+
+    X, y = [], []
+    for e in events:
+        est = e.get("estimatedMinutes")
+        if est is None or e.get("minutes") is None or int(est) <= 0:
+            continue
+        subj = e.get("subjectId") or ""
+        subj_avg = float(np.mean(minutes_by_subject[subj])) if subj else 0.0
+        diff = DIFFICULTY_ENCODING.get((e.get("difficulty") or "medium").lower(), 2)
+        X.append([int(est), diff, subj_avg])
+        y.append(int(e["minutes"]))
+    return LinearRegression().fit(np.array(X, dtype=float), np.array(y, dtype=float))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_online_solution_matches_sklearn(seed):
+    rng = random.Random(seed)
+    events = [_done_event(rng) for _ in range(rng.randint(5, 400))]
+    # Events that only count towards the subject averages
+    events += [{**_done_event(rng), "estimatedMinutes": None} for _ in range(5)]
+
+    model = DurationModel.from_stats(0, build_duration_stats(events))
+    expected = _sklearn_fit(events)
+
+    assert model.n_samples == len(events) - 5
+    assert model.coef == pytest.approx(expected.coef_.tolist(), rel=1e-6, abs=1e-8)
+    assert model.intercept == pytest.approx(float(expected.intercept_), rel=1e-6, abs=1e-8)
+
+
+def test_online_solution_matches_sklearn_with_collinear_features():
+    # One subject and one difficulty: two constant columns, sklearn's
+    # minimum-norm solution must still be reproduced
+    rng = random.Random(9)
+    events = [{**_done_event(rng), "subjectId": "math", "difficulty": "high"} for _ in range(30)]
+
+    model = DurationModel.from_stats(0, build_duration_stats(events))
+    expected = _sklearn_fit(events)
+
+    assert model.coef == pytest.approx(expected.coef_.tolist(), rel=1e-6, abs=1e-8)
+    assert model.intercept == pytest.approx(float(expected.intercept_), rel=1e-6, abs=1e-8)
+
+
+def test_online_updates_match_rebuilt_statistics(db):
+    rng = random.Random(11)
+    events = [_done_event(rng) for _ in range(80)]
+    for e in events:
+        db.task_events.insert_one(dict(e))
+        record_done_event(USER_ID, e)
+
+    online = get_duration_model(USER_ID)
+    rebuilt = DurationModel.from_stats(online.version, build_duration_stats(events))
+
+    assert online.version == len(events)
+    assert online.coef == pytest.approx(rebuilt.coef, rel=1e-9)
+    assert online.intercept == pytest.approx(rebuilt.intercept, rel=1e-9)
+
+
+def test_lookup_between_insert_and_increment_counts_event_once(db):
+    # A model lookup for a user without stored statistics, after the event
+    # is in task_events but before record_done_event has counted it
+    event = _done_event(random.Random(13))
+    db.task_events.insert_one(dict(event))
+    assert get_duration_model(USER_ID).n_samples == 1
+    record_done_event(USER_ID, event)
+
+    stats = db.ml_models.find_one({"userId": USER_ID})["stats"]
+    assert sum(bucket.get("n", 0) for bucket in stats.values()) == 1
+
+
+def test_migrate_backfills_duration_statistics(db):
+    rng = random.Random(17)
+    events = [_done_event(rng) for _ in range(12)]
+    db.task_events.insert_many([dict(e) for e in events])
+    db.meta.insert_one({"_id": "schema", "version": 4})  # before ml_models statistics
+
+    migrate(db)
+
+    doc = db.ml_models.find_one({"userId": USER_ID})
+    assert doc["statsReady"] and doc["stats"] == build_duration_stats(events)
@@ -0,0 +1,29 @@
+import logging
+
+import pytest
+
+from src.db.migrate import SCHEMA_VERSION, migrate
+from src.db.mongo import _check_schema
+
+
+def test_unmigrated_database_refuses_to_start(db, monkeypatch):
+    monkeypatch.delenv("MONGO_REQUIRE_SCHEMA", raising=False)
+    with pytest.raises(RuntimeError, match="python -m src.db.migrate"):
+        _check_schema(db)
+
+    db.meta.insert_one({"_id": "schema", "version": SCHEMA_VERSION - 1})
+    with pytest.raises(RuntimeError, match=f"version {SCHEMA_VERSION - 1}"):
+        _check_schema(db)
+
+
+def test_schema_check_can_be_downgraded_to_a_warning(db, monkeypatch, caplog):
+    monkeypatch.setenv("MONGO_REQUIRE_SCHEMA", "0")
+    with caplog.at_level(logging.WARNING, logger="src.db.mongo"):
+        _check_schema(db)
+    assert "python -m src.db.migrate" in caplog.text
+
+
+def test_migrated_database_starts(db, monkeypatch):
+    monkeypatch.delenv("MONGO_REQUIRE_SCHEMA", raising=False)
+    migrate(db)
+    _check_schema(db)
@@ -0,0 +1,26 @@
+import pytest
+
+from src.services import password_service
+from src.services.password_service import configure_pool, hash_password, needs_rehash, verify_password
+
+
+@pytest.fixture
+def pooled(monkeypatch):
+    monkeypatch.setattr(password_service, "BCRYPT_ROUNDS", 4)
+    configure_pool(1)
+    yield password_service._pool
+    configure_pool(0)
+
+
+def test_hashing_runs_on_one_lazily_started_pool(pooled):
+    hashed = hash_password("correct horse")
+    pool = pooled.get()
+    assert verify_password("correct horse", hashed)
+    assert not verify_password("battery staple", hashed)
+    assert pooled.get() is pool and not needs_rehash(hashed)
+
+    # A broken pool is replaced on the next submit
+    pooled.discard()
+    assert verify_password("correct horse", hashed)
+    assert pooled.get() is not pool
+    pool.shutdown()
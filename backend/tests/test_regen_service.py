@@ -0,0 +1,80 @@
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from src.services import regen_service
+from src.services.regen_service import get_regen_stats
+
+from conftest import USER_ID
+
+N_EVENTS = 20
+
+
+@pytest.fixture(autouse=True)
+def no_repair(monkeypatch):
+    monkeypatch.setattr(regen_service, "SCHEDULE_REPAIR", False)
+
+
+def _fire(client, headers: dict, task_ids: list[str]) -> list[int]:
+    barrier = threading.Barrier(len(task_ids))
+    statuses = []
+
+    def post(task_id: str):
+        barrier.wait()
+        res = client.post("/api/schedule/events", json={"taskId": task_id, "outcome": "done", "minutes": 30}, headers=headers)
+        statuses.append(res.status_code)
+
+    threads = [threading.Thread(target=post, args=(task_id,)) for task_id in task_ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return statuses
+
+
+@pytest.mark.parametrize("debounce_ms, max_generations", [(0, 2), (250, 1)])
+def test_event_burst_is_coalesced(db, client, auth_headers, make_task, monkeypatch, debounce_ms, max_generations):
+    # With a debounce window the whole burst joins the leader before it starts;
+    # without one, events arriving during the first generation share one follow-up
+    monkeypatch.setattr(regen_service, "SCHEDULE_REGEN_DEBOUNCE_MS", debounce_ms)
+    task_ids = [
+        make_task(
+            subjectId=f"subj{i % 3}",
+            topic=f"Topic {i}",
+            difficulty=("low", "medium", "high")[i % 3],
+            estimatedMinutes=30 + i % 60,
+            deadline=(date.today() + timedelta(days=1 + i % 20)).isoformat(),
+        )
+        for i in range(60)
+    ]
+    before = get_regen_stats()
+
+    # Keep the first generation running until every request has joined, so a
+    # slow thread can't arrive after the follow-up has started
+    generate = regen_service.generate_and_store_schedule
+
+    def held_generate(inp):
+        deadline = time.monotonic() + 10
+        while get_regen_stats()["requests"] - before["requests"] < N_EVENTS and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return generate(inp)
+
+    monkeypatch.setattr(regen_service, "generate_and_store_schedule", held_generate)
+
+    assert _fire(client, auth_headers, task_ids[:N_EVENTS]) == [200] * N_EVENTS
+
+    after = get_regen_stats()
+    generations = after["generations"] - before["generations"]
+    assert after["requests"] - before["requests"] == N_EVENTS
+    assert 1 <= generations <= max_generations
+    assert db.schedules.count_documents({"userId": USER_ID}) == generations
+    assert db.task_events.count_documents({"userId": USER_ID}) == N_EVENTS
+
+
+def test_regen_stats_route(client, auth_headers):
+    res = client.get("/api/schedule/regen-stats", headers=auth_headers)
+    assert res.status_code == 200
+    stats = res.get_json()["regen"]
+    assert stats["coalesced"] == stats["requests"] - stats["generations"]
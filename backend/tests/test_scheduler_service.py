@@ -0,0 +1,148 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from src.models.task_event_model import TaskEventCreate
+from src.services import regen_service, scheduler_service
+from src.services.event_service import record_task_event
+from src.services.ml_service import MIN_SAMPLES_LR
+from src.services.scheduler_service import (
+    MINUTES_PER_DAY,
+    GenerateScheduleInput,
+    _sort_tasks,
+    allocate_days,
+    feasibility_report,
+    generate_and_store_schedule,
+)
+
+START = date(2026, 10, 18)
+
+
+def _plan(*tasks: tuple[int, int]) -> tuple[list, dict]:
+    """(minutes, deadline in days from START) per task."""
+    docs = [{"_id": ObjectId(), "topic": f"T{i}", "difficulty": "medium", "deadline": (START + timedelta(days=d)).isoformat()}
+            for i, (_m, d) in enumerate(tasks)]
+    task_meta = {str(doc["_id"]): {"minutes": m} for doc, (m, _d) in zip(docs, tasks)}
+    return _sort_tasks(docs, START), task_meta
+
+
+def test_min_budget_meets_every_deadline():
+    tasks, task_meta = _plan((300, 0), (300, 1), (600, 3))
+    report = feasibility_report(tasks, task_meta, START, 120)
+    assert not report["feasible"] and report["deadlinesReachable"]
+    assert report["requiredDailyMinutes"] == report["minDailyStudyMinutes"] == 300
+
+    budget = report["minDailyStudyMinutes"]
+    assert feasibility_report(tasks, task_meta, START, budget)["feasible"]
+    assert not feasibility_report(tasks, task_meta, START, budget - 1)["feasible"]
+    assert allocate_days(tasks, task_meta, START, budget)[-1]["date"] <= (START + timedelta(days=3)).isoformat()
+
+    # Missed twice: only 80% of the budget is planned
+    assert feasibility_report(tasks, task_meta, START, 120, max_missed=2)["minDailyStudyMinutes"] == 375
+
+
+def test_no_budget_beyond_a_full_day():
+    tasks, task_meta = _plan((MINUTES_PER_DAY + 1, 0), (60, 5))
+    report = feasibility_report(tasks, task_meta, START, 240)
+    assert report["deadlinesReachable"] is False
+    assert report["requiredDailyMinutes"] is None and report["minDailyStudyMinutes"] is None
+
+    # Reachable effective minutes, but not through the missed-task reduction
+    tasks, task_meta = _plan((MINUTES_PER_DAY - 60, 0))
+    assert feasibility_report(tasks, task_meta, START, 240)["minDailyStudyMinutes"] == MINUTES_PER_DAY - 60
+    assert feasibility_report(tasks, task_meta, START, 240, max_missed=2)["deadlinesReachable"] is False
+
+
+def _regenerate_after(task_id: str, outcome: str, minutes: int | None = None) -> dict:
+    event = record_task_event(TaskEventCreate(user_id="u1", task_id=task_id, outcome=outcome, minutes=minutes, scheduled_date=""))
+    return regen_service.regenerate_schedule(
+        GenerateScheduleInput(user_id="u1", start_date=date.today().isoformat(), daily_study_minutes=120), event=event
+    )
+
+
+def _log_done_sessions(make_task, n: int):
+    for i in range(n):
+        task_id = make_task(topic=f"Done {i}", estimatedMinutes=30 + 15 * i, difficulty=("low", "medium", "high")[i % 3])
+        record_task_event(TaskEventCreate(
+            user_id="u1", task_id=task_id, outcome="done", minutes=40 + 20 * i + 10 * (i % 3), scheduled_date=""
+        ))
+
+
+@pytest.mark.parametrize("outcome, done_sessions, edit, repaired", [
+    ("missed", 0, {}, True),
+    ("missed", 0, {"deadline": (date.today() + timedelta(days=200)).isoformat(), "estimatedMinutes": 120}, False),
+    ("missed", 0, {"estimatedMinutes": 120}, False),
+    ("missed", 0, {"difficulty": "high"}, False),
+    ("done", 0, {}, True),
+    # ML active: a missed event keeps the history version, a done event bumps it
+    ("missed", MIN_SAMPLES_LR + 3, {}, True),
+    ("done", MIN_SAMPLES_LR + 3, {}, False),
+])
+def test_repair_matches_full_regeneration(db, make_task, monkeypatch, outcome, done_sessions, edit, repaired):
+    monkeypatch.setattr(regen_service, "SCHEDULE_REPAIR", True)
+    inp = GenerateScheduleInput(user_id="u1", start_date=date.today().isoformat(), daily_study_minutes=120)
+    _log_done_sessions(make_task, done_sessions)
+    task_ids = [
+        make_task(topic=f"Topic {i}", deadline=(date.today() + timedelta(days=20 + i)).isoformat()) for i in range(4)
+    ]
+    # Last edited well before the plan (stored timestamps have millisecond precision)
+    db.tasks.update_many({}, {"$set": {"updatedAt": datetime.now(timezone.utc) - timedelta(hours=1)}})
+    generate_and_store_schedule(inp)
+
+    # PATCH /api/tasks/<id> before the event for that task
+    if edit:
+        db.tasks.update_one({"_id": ObjectId(task_ids[0])}, {"$set": {**edit, "updatedAt": datetime.now(timezone.utc)}})
+    result = _regenerate_after(task_ids[0], outcome, minutes=300 if outcome == "done" else None)
+
+    stored = db.schedules.find_one({"_id": ObjectId(result["id"])})
+    assert ("repairedFrom" in stored) == repaired
+    assert result["days"] == generate_and_store_schedule(inp)["days"]
+
+
+def test_repair_sees_edits_made_while_the_plan_was_built(db, make_task, monkeypatch):
+    monkeypatch.setattr(regen_service, "SCHEDULE_REPAIR", True)
+    inp = GenerateScheduleInput(user_id="u1", start_date=date.today().isoformat(), daily_study_minutes=120)
+    task_ids = [
+        make_task(topic=f"Topic {i}", deadline=(date.today() + timedelta(days=20 + i)).isoformat()) for i in range(4)
+    ]
+    db.tasks.update_many({}, {"$set": {"updatedAt": datetime.now(timezone.utc) - timedelta(hours=1)}})
+
+    # A PATCH lands after the tasks were loaded, before the plan is stored
+    load = scheduler_service._load_schedulable_tasks
+
+    def load_then_edit(db_, user_id):
+        tasks = load(db_, user_id)
+        deadline = (date.today() + timedelta(days=200)).isoformat()
+        db.tasks.update_one({"_id": ObjectId(task_ids[1])}, {"$set": {"deadline": deadline, "updatedAt": datetime.now(timezone.utc)}})
+        return tasks
+
+    monkeypatch.setattr(scheduler_service, "_load_schedulable_tasks", load_then_edit)
+    generate_and_store_schedule(inp)
+    monkeypatch.setattr(scheduler_service, "_load_schedulable_tasks", load)
+
+    result = _regenerate_after(task_ids[0], "missed")
+    assert "repairedFrom" not in db.schedules.find_one({"_id": ObjectId(result["id"])})
+    assert result["days"] == generate_and_store_schedule(inp)["days"]
+
+
+@pytest.mark.parametrize("body, message", [
+    ({"dailyStudyMinutes": ["x"]}, "dailyStudyMinutes must be a list of positive numbers"),
+    ({"dailyStudyMinutes": [120, 0]}, "dailyStudyMinutes must be a list of positive numbers"),
+    ({"dailyStudyMinutes": [True]}, "dailyStudyMinutes must be a list of positive numbers"),
+    ({"dailyStudyMinutes": [None]}, "dailyStudyMinutes must be a list of positive numbers"),
+    ({"dailyStudyMinutes": [120], "startDates": ["bad"]}, "startDates must be YYYY-MM-DD dates"),
+    ({"dailyStudyMinutes": [120], "startDates": [20261018]}, "startDates must be YYYY-MM-DD dates"),
+])
+def test_simulate_rejects_bad_scenarios(client, auth_headers, body, message):
+    res = client.post("/api/schedule/simulate", json=body, headers=auth_headers)
+    assert res.status_code == 400 and res.get_json() == {"message": message}
+
+
+def test_simulate_normalises_scenarios(client, auth_headers, make_task):
+    make_task()
+    body = {"dailyStudyMinutes": ["90", 120.0], "startDates": [" 20261018 "]}
+    res = client.post("/api/schedule/simulate", json=body, headers=auth_headers)
+    assert res.status_code == 200
+    scenarios = res.get_json()["scenarios"]
+    assert [(s["startDate"], s["dailyStudyMinutes"]) for s in scenarios] == [("2026-10-18", 90), ("2026-10-18", 120)]